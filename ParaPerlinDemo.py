@@ -1,15 +1,141 @@
 from tkinter import *
 import tkinter.ttk as ttk
 import time
-from matplotlib.figure import Figure
-import matplotlib
-matplotlib.use('TkAgg')
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from perlin_noise_parallel import generate_perlin_noise
+import queue
+import threading
+import numpy as np
+from perlin_noise_cache import cached_generate, cache_key, default_cache
+from perlin_noise_stats import GenerationStats
+from perlin_noise_pyramid import NoisePyramid
+import perlin_noise_3d
+import simplex_noise
 from multiprocessing import cpu_count
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 
 Grid = namedtuple("Grid", ["row", "column"] )
+# canvas is the width of the plot in pixels, view the (x0, y0, x1, y1) map rectangle shown when zoomed in,
+# full draws from the whole map generated at full resolution, timing its generation
+Request = namedtuple("Request", ["id", "dimension", "scale", "cpu_count", "algorithm", "canvas", "view", "full"],
+                     defaults=[None, False])
+# Noise algorithm of the demo: cached_generate name of the full resolution map, NoisePyramid algorithm
+# and frames function of the animation
+Algorithm = namedtuple("Algorithm", ["cache_name", "pyramid", "frames"])
+ALGORITHMS = {
+    "Perlin": Algorithm("parallel", "perlin", perlin_noise_3d.frames),
+    "Simplex": Algorithm("simplex", "simplex", simplex_noise.frames),
+}
+
+# Pyramids of this many maps are kept, so switching back to a recent map only redraws
+PYRAMID_CACHE_SIZE = 4
+# Wait this long after the last slider change before generating
+DEBOUNCE_MS = 150
+# Poll interval for finished generations
+POLL_MS = 30
+# Each scroll wheel step zooms by this factor
+ZOOM_FACTOR = 1.25
+# Animation frames are generated at about this many pixels per side, every this many ms,
+# advancing this much time per frame
+ANIMATION_SIZE = 256
+FRAME_MS = 40
+ANIMATION_T_STEP = 1.0
+
+class NoiseWorker:
+    """
+    Generates noise off the Tk thread. Only the pyramid level matching the canvas is computed
+    and drawn, and zoomed views are refined from finer pyramid levels. The full resolution map
+    is generated only when asked for, through the shared cache of perlin_noise_cache, and its
+    levels and windows are then views of it. Pyramid levels are normalized with sampled extrema,
+    so they can differ slightly from the full map at small scales, see NoisePyramid.
+
+    Only the newest request is kept, requests superseded while waiting are never started and
+    results of stale requests are dropped, so slider drags never queue up generations.
+    Results are (request, noise to draw or None, generation time label or None, phase
+    breakdown or None, map extent of the noise).
+    """
+
+    def __init__(self):
+        self.results = queue.Queue()
+        self._latest = None
+        self._condition = threading.Condition()
+        # (dimension, scale, algorithm, full) -> NoisePyramid, least recently used first
+        self._pyramids = OrderedDict()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def submit(self, request):
+        with self._condition:
+            self._latest = request
+            self._condition.notify()
+
+    def is_stale(self, request):
+        with self._condition:
+            return self._latest is not None and self._latest.id != request.id
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._latest is None:
+                    self._condition.wait()
+                request = self._latest
+                self._latest = None
+            self._generate(request)
+
+    def _pyramid_for(self, request, noise=None):
+        # Levels already computed are kept for the recently drawn maps
+        algorithm = ALGORITHMS[request.algorithm]
+        key = (request.dimension, request.scale, algorithm.pyramid, noise is not None)
+        if key in self._pyramids:
+            self._pyramids.move_to_end(key)
+            return self._pyramids[key]
+        pyramid = self._pyramids[key] = NoisePyramid(request.dimension, request.dimension, request.scale,
+                                                     algorithm=algorithm.pyramid, noise=noise)
+        if len(self._pyramids) > PYRAMID_CACHE_SIZE:
+            self._pyramids.popitem(last=False)
+        return pyramid
+
+    def _full_map(self, request):
+        # Whole map at full resolution, generated and timed on a cache miss, revisited slider
+        # positions and zoomed views reuse the cached map
+        algorithm = ALGORITHMS[request.algorithm]
+        key = cache_key((request.dimension, request.dimension), request.scale, algorithm=algorithm.cache_name)
+        cached = key in default_cache
+        if not cached and request.view is None:
+            self.results.put((request, None, "...", None, None))
+        stats = GenerationStats()
+        start_time = time.time()
+        noise = cached_generate(request.dimension, request.dimension, request.scale, algorithm=algorithm.cache_name,
+                                cpu_count=request.cpu_count, stats=stats)
+        if cached:
+            return noise, "cached", "full map reused from the cache"
+        return noise, f"{time.time() - start_time:.3f}", stats.summary()
+
+    def _generate(self, request):
+        full = None
+        if request.full:
+            if self.is_stale(request):
+                return
+            full = self._full_map(request)
+        pyramid = self._pyramid_for(request, None if full is None else full[0])
+        if request.view is not None:
+            # Zoomed in, only the visible window of the level matching the canvas
+            x_start, y_start, x_stop, y_stop = request.view
+            level = pyramid.level_for(max(x_stop - x_start, y_stop - y_start), request.canvas)
+            noise, extent = pyramid.window(level, x_start, y_start, x_stop, y_stop)
+            self.results.put((request, noise, None, None, extent))
+            return
+
+        # Only the level matching the canvas is drawn, evaluated straight from the lattice,
+        # or a strided view of the full map when there is one
+        level = pyramid.level_for(request.dimension, request.canvas)
+        start_time = time.time()
+        noise = pyramid.level(level)
+        noise_gen_time = time.time() - start_time
+        rows, columns = noise.shape
+        phases = f"level {level}, {columns} x {rows} of {request.dimension} x {request.dimension}"
+        if full is not None:
+            _, noise_gen_time, phases = full
+        else:
+            noise_gen_time = f"{noise_gen_time:.3f}"
+        self.results.put((request, noise, noise_gen_time, phases, (0, request.dimension, request.dimension, 0)))
 
 class AdjustablePerlin:
 
@@ -109,20 +235,57 @@ class AdjustablePerlin:
         self.noise_gen_time = StringVar()
         self.noise_gen_time.set("0")
         Label(mainframe, textvariable=self.noise_gen_time, font="Helvetica 25 bold", justify="center", bg=bgcolor).grid()
+        # Per-phase breakdown of the last generation
+        self.noise_gen_phases = StringVar()
+        Label(mainframe, textvariable=self.noise_gen_phases, font="Courier 9", justify="left", bg=bgcolor).grid()
 
         # Colormap drop down
         cmaps = ["flag", "prism", "ocean", "gist_earth", "terrain", "twilight", "Dark2", "tab20c", "hot", "afmhot", "gist_heat", "gray", "binary"]
         self.cmap_choice = StringVar()
         
         self.cmap_dropdown = ttk.OptionMenu(mainframe, self.cmap_choice, cmaps[0], *cmaps)
-        self.cmap_choice.trace_add("write", self.update_noise)
+        # Colormap only changes the display, redraw without generating
+        self.cmap_choice.trace_add("write", self.redraw_noise)
         self.cmap_dropdown.grid()
 
-        # Create noise figure
+        # Algorithm drop down, switching regenerates or reuses the cached map of that algorithm
+        self.algorithm_choice = StringVar()
+        ttk.OptionMenu(mainframe, self.algorithm_choice, "Perlin", *ALGORITHMS).grid()
+        self.algorithm_choice.trace_add("write", self.update_noise)
+
+        # Plays time animated noise of the current scale, dimension and algorithm
+        self.animate = BooleanVar()
+        self.animate.trace_add("write", self.toggle_animation)
+        Checkbutton(mainframe, text="Animate", variable=self.animate, font="Helvetica 15", bg=bgcolor).grid()
+
+        # Gen time of the drawn level by default, draws and times the whole map at full resolution when checked
+        self.full_timing = BooleanVar()
+        self.full_timing.trace_add("write", self.update_noise)
+        Checkbutton(mainframe, text="Time full map", variable=self.full_timing, font="Helvetica 15", bg=bgcolor).grid()
+
+        # Create noise figure, matplotlib only loaded once the window is built
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
         fig = Figure(figsize=(5, 5), dpi=100)
         self.plt = fig.add_subplot()
         self.canvas = FigureCanvasTkAgg(fig, master = mainframe)
         self.canvas.get_tk_widget().grid(sticky=(N,W,E,S))
+        # Scroll wheel zooms around the cursor, finer levels are computed for the zoomed view
+        self.canvas.mpl_connect("scroll_event", self.zoom)
+
+        # Generate noise in the background, debounced, and poll for results
+        self.root = root
+        self.worker = NoiseWorker()
+        self.request_id = 0
+        self.pending = None
+        self.current_request = None
+        self.map_request = None
+        self.pending_view = None
+        self.drawn = None
+        self.animation = None
+        self.animation_image = None
+        self.animation_job = None
+        self.root.after(POLL_MS, self.poll_results)
         # Generate noise for first time
         self.update_noise(None, None, None)
 
@@ -132,7 +295,7 @@ class AdjustablePerlin:
     
     # Call back to update noise
     def update_noise(self, var, index, mode):
-        # Get gui changed values, and update gui labels
+        # Get gui changed values, and update gui labels right away
         dimension = self.dimension_input.get()
         self.dimension_str.set(str(dimension))
         scale = self.scale_input.get()
@@ -140,25 +303,127 @@ class AdjustablePerlin:
         cpu_count = self.cpu_count_input.get()
         self.cpu_count_label.set(str(cpu_count))
 
-        # Time noise generation
-        start_time = time.time()
-        # Gen noise
-        noise = generate_perlin_noise(dimension, dimension, scale, cpu_count)
-        noise_gen_time = time.time() - start_time
+        # Restart the debounce timer, only the last change of a drag generates noise
+        if self.pending is not None:
+            self.root.after_cancel(self.pending)
+        self.pending = self.root.after(DEBOUNCE_MS, self.submit_noise)
+
+    def submit_noise(self):
+        self.pending = None
+        self.request_id += 1
+        self.current_request = Request(self.request_id, self.dimension_input.get(), self.scale_input.get(), self.cpu_count_input.get(),
+                                       self.algorithm_choice.get(), self.plt.bbox.width, full=self.full_timing.get())
+        self.map_request = self.current_request
+        self.worker.submit(self.current_request)
+
+    def zoom(self, event):
+        if event.inaxes is not self.plt or self.map_request is None or self.animate.get():
+            return
+        # Zoom the axes limits around the cursor right away, within the map
+        factor = 1 / ZOOM_FACTOR if event.button == "up" else ZOOM_FACTOR
+        dimension = self.map_request.dimension
+        (x_start, x_stop), (_, y_start) = self.plt.get_xlim(), self.plt.get_ylim()
+        size = min(dimension, (x_stop - x_start) * factor)
+        x_start = min(max(0, event.xdata - (event.xdata - x_start) * factor), dimension - size)
+        y_start = min(max(0, event.ydata - (event.ydata - y_start) * factor), dimension - size)
+        self.plt.set_xlim(x_start, x_start + size)
+        self.plt.set_ylim(y_start + size, y_start)
+        self.canvas.draw_idle()
+
+        # Refine once the wheel stops
+        if self.pending_view is not None:
+            self.root.after_cancel(self.pending_view)
+        self.pending_view = self.root.after(DEBOUNCE_MS, self.submit_view)
+
+    def submit_view(self):
+        self.pending_view = None
+        (x_start, x_stop), (y_stop, y_start) = self.plt.get_xlim(), self.plt.get_ylim()
+        self.request_id += 1
+        view = None if x_stop - x_start >= self.map_request.dimension else (x_start, y_start, x_stop, y_stop)
+        self.current_request = self.map_request._replace(id=self.request_id, canvas=self.plt.bbox.width, view=view)
+        self.worker.submit(self.current_request)
+
+    def poll_results(self):
+        # Draw finished levels and windows of the newest request, show timings of the current map, drop stale ones
+        try:
+            while True:
+                request, noise, noise_gen_time, phases, extent = self.worker.results.get_nowait()
+                if request == self.map_request:
+                    if noise_gen_time is not None:
+                        self.noise_gen_time.set(noise_gen_time)
+                    if phases is not None:
+                        self.noise_gen_phases.set(phases)
+                if request == self.current_request and noise is not None:
+                    self.draw_noise(request, noise, extent)
+        except queue.Empty:
+            pass
+        self.root.after(POLL_MS, self.poll_results)
+
+    def draw_noise(self, request, noise, extent):
+        self.drawn = (request, noise, extent)
+        self.redraw_noise(None, None, None)
+
+    def redraw_noise(self, var, index, mode):
+        # Clear previous plot and draw the last level or window at its map extent
+        if self.drawn is not None and not self.animate.get():
+            request, noise, extent = self.drawn
+            self.plt.cla()
+            self.plt.imshow(noise, cmap=self.cmap_choice.get(), interpolation='nearest', vmin=0, vmax=1, extent=extent)
+            if request.view is not None:
+                x_start, y_start, x_stop, y_stop = request.view
+                self.plt.set_xlim(x_start, x_stop)
+                self.plt.set_ylim(y_stop, y_start)
+            self.canvas.draw()
+
+    def toggle_animation(self, var, index, mode):
+        if self.animate.get():
+            # A single frame loop, setting the checkbox again while it plays starts no other one
+            if self.animation_job is None:
+                self.animation = None
+                self.animation_image = None
+                self.animation_job = self.root.after(FRAME_MS, self.play_frame)
+        else:
+            if self.animation_job is not None:
+                self.root.after_cancel(self.animation_job)
+                self.animation_job = None
+            # Back to the static map
+            self.redraw_noise(None, None, None)
 
-        # Update generation time label
-        self.noise_gen_time.set(f"{noise_gen_time:.3f}")
+    def play_frame(self):
+        self.animation_job = None
+        if not self.animate.get():
+            return
+        start = time.time()
+        dimension, scale, algorithm = self.dimension_input.get(), self.scale_input.get(), self.algorithm_choice.get()
+        # New iterator when the map or algorithm changes, Perlin frames reuse lattice planes while it stays the same
+        if self.animation is None or self.animation[0] != (dimension, scale, algorithm):
+            step = max(1, dimension // ANIMATION_SIZE)
+            self.animation = ((dimension, scale, algorithm),
+                              ALGORITHMS[algorithm].frames(0, scale, dimension, dimension, t_step=ANIMATION_T_STEP,
+                                                           dtype=np.float32, step=step))
+            self.animation_image = None
+        noise = next(self.animation[1])
 
-        # Clear previous plot and draw new one
-        self.plt.cla()
-        self.plt.imshow(noise, cmap=self.cmap_choice.get(), interpolation='nearest')
-        self.canvas.draw()
+        # Only the image data changes between frames, the axes are drawn once
+        if self.animation_image is None:
+            self.plt.cla()
+            self.animation_image = self.plt.imshow(noise, cmap=self.cmap_choice.get(), interpolation='nearest',
+                                                   vmin=0, vmax=1, extent=(0, dimension, dimension, 0))
+        else:
+            self.animation_image.set_data(noise)
+            self.animation_image.set_cmap(self.cmap_choice.get())
+        self.canvas.draw_idle()
+        self.noise_gen_time.set(f"{1000 * (time.time() - start):.1f} ms/frame")
+        self.animation_job = self.root.after(max(1, FRAME_MS - int(1000 * (time.time() - start))), self.play_frame)
 
 def grid_columize_widgets(*widgets: Widget):
     for i, widget in enumerate(widgets):
         widget.grid(row=0, column=i)
 
 if __name__ == "__main__":
+    # Backend only chosen when running the demo, importing the module loads no plotting
+    import matplotlib
+    matplotlib.use('TkAgg')
     root = Tk()
     root.style = ttk.Style()
     root.style.theme_use("clam")
@@ -0,0 +1,87 @@
+""" Command line noise generator, writes a map to .npy or PNG
+
+Usage:
+    python perlin_cli.py noise.png --width 1024 --height 1024 --scale 100
+    python perlin_cli.py noise.npy --width 8192 --height 8192 --scale 100 --dtype float32 --processes 4
+    python perlin_cli.py noise.png --width 2048 --height 2048 --scale 50 --dtype uint16
+    python perlin_cli.py noise.png --width 2048 --height 2048 --scale 50 --algorithm simplex
+
+Made for short lived batch jobs: only argparse and numpy are loaded at startup, the noise
+engine needed is imported when it runs, and nothing imports plotting or GUI modules. One
+process uses perlin_noise_vectorized or simplex_noise directly, more use perlin_noise_parallel.
+PNG files are 8 bit grayscale, or 16 bit for --dtype uint16. Simplex noise is float32 or
+float64 only.
+"""
+import sys
+import argparse
+import numpy as np
+
+DTYPES = ["float32", "float64", "uint8", "uint16", "float16"]
+
+def generate(width, height, scale, seed=0, algorithm="perlin", dtype="float32", processes=1):
+    """
+    Generate a map with the lightest engine that fits the request.
+
+    Parameters:
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (int): Scale factor for generating the noise.
+    - seed (int): Seed of the lattice.
+    - algorithm (str): "perlin" or "simplex".
+    - dtype (str): One of DTYPES, Perlin noise only for uint8, uint16 and float16.
+    - processes (int): Worker processes, 1 generates in this process.
+
+    Returns:
+    - noise (n-dimensional array): Noise array of shape (height, width), normalized to [0, 1] for float dtypes.
+    """
+    dtype = np.dtype(dtype)
+    if algorithm == "simplex" and dtype.name not in ("float32", "float64"):
+        raise ValueError(f"simplex noise is float32 or float64, not {dtype.name}")
+    if processes > 1:
+        from perlin_noise_parallel import PerlinGenerator
+        with PerlinGenerator(processes) as generator:
+            if algorithm == "simplex":
+                return generator.generate_simplex(width, height, scale, seed, dtype)
+            return generator.generate(width, height, scale, seed, dtype)
+    if algorithm == "simplex":
+        from simplex_noise import generate_simplex_noise
+        return generate_simplex_noise(width, height, scale, seed, dtype)
+    from perlin_noise_vectorized import generate_perlin_noise
+    return generate_perlin_noise(width, height, scale, dtype, seed)
+
+def write(path, noise):
+    """
+    Write a map, as PNG for a .png path and .npy otherwise.
+
+    Parameters:
+    - path (str): Output file.
+    - noise (n-dimensional array): Noise array.
+    """
+    if path.lower().endswith(".png"):
+        from perlin_noise_png import write_png
+        # 16 bit maps keep their precision, other dtypes are stored as 8 bit
+        write_png(path, noise if noise.dtype in (np.uint8, np.uint16) else noise.astype(np.float32))
+    else:
+        np.save(path, noise)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("path", help="Output file, .png or .npy")
+    parser.add_argument("--width", type=int, default=512)
+    parser.add_argument("--height", type=int, default=512)
+    parser.add_argument("--scale", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--algorithm", choices=["perlin", "simplex"], default="perlin")
+    parser.add_argument("--dtype", choices=DTYPES, default="float32")
+    parser.add_argument("--processes", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    try:
+        noise = generate(args.width, args.height, args.scale, args.seed, args.algorithm, args.dtype, args.processes)
+    except ValueError as error:
+        parser.error(str(error))
+    write(args.path, noise)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,9 +4,10 @@
 import math
 import random
 import numpy as np
-import matplotlib.pyplot as plt
 
 def plot_noise(noise, plt_title, cmap_given = "gray"):
+    # Import matplotlib left here, as plotting not necessary to noise gen
+    import matplotlib.pyplot as plt
     plt.imshow(noise, cmap=cmap_given, interpolation='nearest')
     #plt.colorbar()
     plt.title(plt_title)
@@ -0,0 +1,226 @@
+# Time animated Perlin noise, 3D (x, y, t) noise on a hashed gradient lattice
+# Every frame of a t cell blends the same two lattice planes, so the xy interpolation of a
+# plane is computed once and reused by every frame between its t cells:
+#   noise(x, y, t) = lerp(A0 + dt * C0, A1 + (dt - 1) * C1, smoothstep(dt))
+# A is the 2D Perlin noise of the x and y gradient components of a plane and C the xy
+# interpolation of the t components, so a frame costs a few array operations and moving
+# to the next t cell computes a single new plane.
+
+import math
+import numpy as np
+from perlin_noise_vectorized import smoothstep, lerp, block_rows_for, axis_table, compute_block
+from perlin_noise_tiles import hash_coordinates
+
+# Largest |value| of the noise for a lattice of unit gradients, sqrt(3) / 2 in 3D
+PERLIN_BOUND_3D = math.sqrt(0.75)
+
+def gradients_3d(seed, cell_t, first_row, first_column, rows, columns):
+    """
+    Window of one t plane of the unit 3D gradient lattice of a seed.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - cell_t (int): Lattice t of the plane.
+    - first_row (int): Lattice row of the first window row, may be negative.
+    - first_column (int): Lattice column of the first window column, may be negative.
+    - rows (int): Number of lattice rows.
+    - columns (int): Number of lattice columns.
+
+    Returns:
+    - gradients (n-dimensional array): Unit gradients of shape (rows, columns, 3), (x, y, t) components.
+    """
+    cell_y = np.arange(first_row, first_row + rows)[:, None]
+    cell_x = np.arange(first_column, first_column + columns)
+    return np.stack(gradients_3d_at(seed, cell_t, cell_y, cell_x), axis=-1)
+
+def gradients_3d_at(seed, cell_t, cell_y, cell_x):
+    """
+    Unit 3D gradients of a seed at arbitrary lattice points, uniform on the sphere.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - cell_t (n-dimensional array): Integer lattice t.
+    - cell_y (n-dimensional array): Integer lattice rows, broadcast with cell_t.
+    - cell_x (n-dimensional array): Integer lattice columns, broadcast with cell_t and cell_y.
+
+    Returns:
+    - gradients (tuple): (x components, y components, t components) arrays.
+    """
+    hashes = hash_coordinates(seed, cell_t, cell_y, cell_x)
+    # High 32 bits pick the height on the sphere, low 32 bits the angle around it
+    z = (hashes >> np.uint64(32)) * (2 / 2 ** 32) - 1
+    angle = (hashes & np.uint64(0xFFFFFFFF)) * (2 * math.pi / 2 ** 32)
+    radius = np.sqrt(1 - z * z)
+    return radius * np.cos(angle), radius * np.sin(angle), z
+
+def plane(seed, scale, cell_t, x_start, y_start, width, height, dtype=np.float64, step=1):
+    """
+    xy interpolation of one t plane of the lattice, shared by every frame next to the plane.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor along x and y.
+    - cell_t (int): Lattice t of the plane.
+    - x_start (int): Map column of the left edge, may be negative.
+    - y_start (int): Map row of the top edge, may be negative.
+    - width (int): Width of the map rectangle.
+    - height (int): Height of the map rectangle.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - step (int): Only every step-th row and column is computed, see compute_block.
+
+    Returns:
+    - planes (tuple): (A, C) arrays of shape (ceil(height / step), ceil(width / step)), the noise of
+      the xy gradient components and the interpolated t components.
+    """
+    rows, columns = len(range(0, height, step)), len(range(0, width, step))
+    first_row, first_column = int(y_start // scale), int(x_start // scale)
+    gradients = gradients_3d(seed, cell_t, first_row, first_column,
+                             int((y_start + height - 1) // scale) + 2 - first_row,
+                             int((x_start + width - 1) // scale) + 2 - first_column)
+
+    # A, the 2D kernel on the x and y components
+    planar = np.empty((rows, columns), dtype=dtype)
+    block_rows = block_rows_for(columns)
+    for block_start in range(0, rows, block_rows):
+        block_stop = min(block_start + block_rows, rows)
+        compute_block(gradients[..., :2], y_start + block_start * step, y_start + block_stop * step, columns, scale,
+                      planar[block_start:block_stop], (first_row, first_column), x_start, step=step)
+
+    # C, smoothstep interpolation of the t components, along x once per lattice row then along y
+    cell_x, _, weight_x = axis_table(x_start, columns, scale, dtype, step)
+    cell_y, _, weight_y = axis_table(y_start, rows, scale, dtype, step)
+    values = gradients[..., 2].astype(dtype, copy=False)
+    left = values[:, cell_x - first_column]
+    lattice_rows = left + weight_x * (values[:, cell_x + 1 - first_column] - left)
+    top = lattice_rows[cell_y - first_row]
+    temporal = lattice_rows[cell_y + 1 - first_row]
+    temporal -= top
+    temporal *= weight_y[:, None]
+    temporal += top
+    return planar, temporal
+
+def frames(seed, scale, width, height, t_start=0.0, t_step=1.0, count=None, time_scale=None,
+           x_start=0, y_start=0, dtype=np.float64, normalize=True, step=1):
+    """
+    Iterate over consecutive frames of animated noise, reusing lattice planes between frames.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor along x and y.
+    - width (int): Width of the frames.
+    - height (int): Height of the frames.
+    - t_start (float): Time of the first frame.
+    - t_step (float): Time between frames.
+    - count (int): Number of frames, None iterates forever.
+    - time_scale (float): Scale factor along t, defaults to scale.
+    - x_start (int): Map column of the left edge, may be negative.
+    - y_start (int): Map row of the top edge, may be negative.
+    - dtype (data-type): np.float64 or np.float32 for the computation and frames.
+    - normalize (bool): Map the theoretical range to [0, 1], the same for every frame so the
+      animation does not flicker, otherwise yield raw noise values.
+    - step (int): Only every step-th row and column is computed, for previews.
+
+    Yields:
+    - frame (n-dimensional array): Noise of shape (ceil(height / step), ceil(width / step)), a new array per frame.
+    """
+    time_scale = scale if time_scale is None else time_scale
+    planes = {}
+    index = 0
+    while count is None or index < count:
+        t = (t_start + index * t_step) / time_scale
+        cell_t = math.floor(t)
+        offset_t = t - cell_t
+
+        # Keep only the two planes around t, moving forward a cell computes one new plane
+        for cell in list(planes):
+            if cell not in (cell_t, cell_t + 1):
+                del planes[cell]
+        for cell in (cell_t, cell_t + 1):
+            if cell not in planes:
+                planes[cell] = plane(seed, scale, cell, x_start, y_start, width, height, dtype, step)
+        (planar_0, temporal_0), (planar_1, temporal_1) = planes[cell_t], planes[cell_t + 1]
+
+        # Dot products of the near and far planes, then the t blend
+        noise = planar_0 + offset_t * temporal_0
+        far = planar_1 + (offset_t - 1) * temporal_1
+        far -= noise
+        far *= smoothstep(offset_t)
+        noise += far
+        if normalize:
+            noise += PERLIN_BOUND_3D
+            noise /= 2 * PERLIN_BOUND_3D
+        yield noise
+        index += 1
+
+def frame(seed, scale, t, width, height, time_scale=None, x_start=0, y_start=0, dtype=np.float64, normalize=True, step=1):
+    """
+    Single frame of animated noise, see frames.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor along x and y.
+    - t (float): Time of the frame.
+    - width (int): Width of the frame.
+    - height (int): Height of the frame.
+    - time_scale (float): Scale factor along t, defaults to scale.
+    - x_start (int): Map column of the left edge.
+    - y_start (int): Map row of the top edge.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Map the theoretical range to [0, 1].
+    - step (int): Only every step-th row and column is computed.
+
+    Returns:
+    - frame (n-dimensional array): Noise of shape (ceil(height / step), ceil(width / step)).
+    """
+    return next(frames(seed, scale, width, height, t, 1.0, 1, time_scale, x_start, y_start, dtype, normalize, step))
+
+def sample(seed, scale, x, y, t, time_scale=None, normalize=True):
+    """
+    Animated noise at arbitrary points, from the eight lattice corners of every point.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor along x and y.
+    - x (n-dimensional array): Map x coordinates.
+    - y (n-dimensional array): Map y coordinates, broadcast with x.
+    - t (n-dimensional array): Times, broadcast with x and y.
+    - time_scale (float): Scale factor along t, defaults to scale.
+    - normalize (bool): Map the theoretical range to [0, 1].
+
+    Returns:
+    - noise (n-dimensional array): Noise value of every point.
+    """
+    time_scale = scale if time_scale is None else time_scale
+    position = [np.asarray(x) / scale, np.asarray(y) / scale, np.asarray(t) / time_scale]
+    cells = [np.floor(coordinate).astype(np.int64) for coordinate in position]
+    offsets = [coordinate - cell for coordinate, cell in zip(position, cells)]
+
+    # Dot product of every corner, interpolated along x, then y, then t
+    corners = {}
+    for corner_t in (0, 1):
+        for corner_y in (0, 1):
+            for corner_x in (0, 1):
+                gradient = gradients_3d_at(seed, cells[2] + corner_t, cells[1] + corner_y, cells[0] + corner_x)
+                corners[corner_t, corner_y, corner_x] = sum(
+                    component * (offset - corner)
+                    for component, offset, corner in zip(gradient, offsets, (corner_x, corner_y, corner_t)))
+    weight_x, weight_y, weight_t = (smoothstep(offset) for offset in offsets)
+    rows = {(corner_t, corner_y): lerp(corners[corner_t, corner_y, 0], corners[corner_t, corner_y, 1], weight_x)
+            for corner_t in (0, 1) for corner_y in (0, 1)}
+    noise = lerp(lerp(rows[0, 0], rows[0, 1], weight_y), lerp(rows[1, 0], rows[1, 1], weight_y), weight_t)
+    if normalize:
+        noise = (noise + PERLIN_BOUND_3D) / (2 * PERLIN_BOUND_3D)
+    return noise
+
+if __name__ == '__main__':
+    # Demo Usage, frames per second of a 512 x 512 animation
+    import time
+    width = height = 512
+    scale = 50
+    count = 200
+
+    start = time.time()
+    for noise in frames(0, scale, width, height, t_step=1.0, count=count, dtype=np.float32):
+        pass
+    total = time.time() - start
+    print(f"{count} frames of {width} x {height} took: {total:.6f}Seconds, {count / total:.1f} frames per second")
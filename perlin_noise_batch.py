@@ -0,0 +1,124 @@
+# Batches of seeded Perlin noise maps generated in one call
+# Every map of a batch shares the per-axis index and weight tables, and the kernel evaluates
+# the same rows of several small maps at once, so thousands of maps cost one call with no
+# per-map setup. Seeding is local to the call, no global RNG state.
+
+import numpy as np
+from perlin_noise_vectorized import BLOCK_PIXELS, make_gradients, block_rows_for, axis_table, slice_table, compute_block
+
+# Fewest rows of a map in a block spanning several maps, so lattice rows stay amortized over pixel rows
+MIN_BLOCK_ROWS = 64
+
+def batch_gradients(width, height, scale, seeds, count=None):
+    """
+    Stack of gradient lattices, one per map of a batch.
+
+    Parameters:
+    - width (int): Width of every noise map.
+    - height (int): Height of every noise map.
+    - scale (int): Scale factor for generating the noise.
+    - seeds (iterable or np.random.Generator): Seed of every map, map i is then identical to
+      generate_perlin_noise(..., seed=seeds[i]), or a Generator the lattices are drawn from.
+    - count (int): Number of maps, required with a Generator, ignored with seeds.
+
+    Returns:
+    - gradients (n-dimensional array): Lattices of shape (n, height//scale + 2, width//scale + 2, 2).
+    """
+    if isinstance(seeds, np.random.Generator):
+        if count is None:
+            raise ValueError("count is required when seeds is a Generator")
+        return seeds.standard_normal((count, height // scale + 2, width // scale + 2, 2))
+    seeds = list(seeds)
+    gradients = np.empty((len(seeds), height // scale + 2, width // scale + 2, 2))
+    for index, seed in enumerate(seeds):
+        gradients[index] = make_gradients(width, height, scale, seed)
+    return gradients
+
+def normalize_maps(maps):
+    """
+    Normalize every map of a stack to the range [0, 1] on its own, in place.
+
+    Parameters:
+    - maps (n-dimensional array): Floating point maps of shape (n, height, width), modified in place.
+
+    Returns:
+    - maps (n-dimensional array): The same array.
+    """
+    array_min = maps.min(axis=(1, 2), keepdims=True)
+    divide_by = maps.max(axis=(1, 2), keepdims=True) - array_min
+    # Flat maps stay at 0, as with normalize
+    divide_by[divide_by == 0] = 1
+    maps -= array_min
+    maps /= divide_by
+    return maps
+
+def fill_maps(gradients, maps, scale, normalize=True):
+    """
+    Compute whole maps of a batch into an output stack.
+
+    Parameters:
+    - gradients (n-dimensional array): Lattices of the maps, from batch_gradients.
+    - maps (n-dimensional array): Destination of shape (n, height, width), its dtype is used for the math.
+    - scale (int): Scale factor for generating the noise.
+    - normalize (bool): Normalize every map to [0, 1], otherwise keep the raw values.
+
+    Returns:
+    - maps (n-dimensional array): The same array.
+    """
+    count, height, width = maps.shape
+    # Blocks of BLOCK_PIXELS span several maps, sized from the map pixels: as many whole maps as
+    # fit, or for larger maps the same MIN_BLOCK_ROWS or more rows of as many maps as fit, so
+    # 256 x 256 maps are evaluated 2 at a time while blocks stay cache sized
+    if width * height <= BLOCK_PIXELS:
+        group = BLOCK_PIXELS // (width * height)
+        block_rows = height
+    else:
+        group = max(1, BLOCK_PIXELS // (width * MIN_BLOCK_ROWS))
+        block_rows = block_rows_for(width * group)
+    y_table = axis_table(0, height, scale, maps.dtype)
+    for first in range(0, count, group):
+        stop = min(first + group, count)
+        for block_start in range(0, height, block_rows):
+            block_stop = min(block_start + block_rows, height)
+            compute_block(gradients[first:stop], block_start, block_stop, width, scale,
+                          maps[first:stop, block_start:block_stop], y_table=slice_table(y_table, block_start, block_stop))
+    if normalize:
+        normalize_maps(maps)
+    return maps
+
+def generate_batch(width, height, scale, seeds, count=None, dtype=np.float64, normalize=True):
+    """
+    Generate a batch of Perlin noise maps in one call.
+
+    Parameters:
+    - width (int): Width of every noise map.
+    - height (int): Height of every noise map.
+    - scale (int): Scale factor for generating the noise.
+    - seeds (iterable or np.random.Generator): Seed of every map, or a Generator, see batch_gradients.
+    - count (int): Number of maps, required with a Generator.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Normalize every map to [0, 1] on its own.
+
+    Returns:
+    - maps (n-dimensional array): Noise maps of shape (n, height, width).
+    """
+    gradients = batch_gradients(width, height, scale, seeds, count)
+    maps = np.empty((len(gradients), height, width), dtype=dtype)
+    return fill_maps(gradients, maps, scale, normalize)
+
+if __name__ == '__main__':
+    # Demo Usage
+    import time
+    width = height = 256
+    scale = 30
+    count = 1000
+
+    start = time.time()
+    maps = generate_batch(width, height, scale, range(count), dtype=np.float32)
+    print(f"{count} maps of {width} x {height} took: {time.time() - start:.6f}Seconds")
+
+    from perlin_noise_vectorized import generate_perlin_noise
+    start = time.time()
+    for seed in range(count):
+        generate_perlin_noise(width, height, scale, np.float32, seed)
+    print(f"{count} single calls took: {time.time() - start:.6f}Seconds")
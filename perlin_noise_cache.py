@@ -0,0 +1,149 @@
+# Memoization of generated noise maps
+# LRU cache bounded by the bytes of the arrays it holds, so display-only changes and
+# repeated requests for the same map reuse the array instead of regenerating it.
+
+import threading
+from collections import OrderedDict
+
+# Default memory bound of a cache, 512 MiB
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+class NoiseCache:
+    """
+    Thread safe LRU cache of noise arrays, evicting least recently used arrays once the
+    total size of the cached arrays exceeds max_bytes.
+
+    Cached arrays are made read only, as every caller of the same key shares them.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        """
+        Parameters:
+        - max_bytes (int): Memory bound of the cached arrays.
+        """
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._arrays = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._arrays)
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._arrays
+
+    def get(self, key):
+        """
+        Cached array of a key, marked as most recently used.
+
+        Parameters:
+        - key (tuple): Cache key, see cache_key.
+
+        Returns:
+        - noise (n-dimensional array): Read only cached array, or None on a miss.
+        """
+        with self._lock:
+            noise = self._arrays.get(key)
+            if noise is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._arrays.move_to_end(key)
+            return noise
+
+    def put(self, key, noise):
+        """
+        Cache an array, evicting least recently used arrays to stay within max_bytes.
+        Arrays larger than max_bytes are not cached.
+
+        Parameters:
+        - key (tuple): Cache key, see cache_key.
+        - noise (n-dimensional array): Array to cache, made read only once stored.
+
+        Returns:
+        - noise (n-dimensional array): The same array.
+        """
+        with self._lock:
+            if key in self._arrays:
+                self.nbytes -= self._arrays.pop(key).nbytes
+            if noise.nbytes > self.max_bytes:
+                return noise
+            noise.setflags(write=False)
+            self._arrays[key] = noise
+            self.nbytes += noise.nbytes
+            while self.nbytes > self.max_bytes:
+                _, evicted = self._arrays.popitem(last=False)
+                self.nbytes -= evicted.nbytes
+        return noise
+
+    def clear(self):
+        with self._lock:
+            self._arrays.clear()
+            self.nbytes = 0
+
+def cache_key(dimension, scale, seed=0, algorithm="parallel"):
+    """
+    Key of a noise map, everything that changes its values and nothing that does not,
+    like the cpu count or the colormap.
+
+    Parameters:
+    - dimension (tuple): (width, height) of the noise array.
+    - scale (int): Scale factor for generating the noise.
+    - seed (int): Seed of the gradient lattice.
+    - algorithm (str): Name of the algorithm in ALGORITHMS.
+
+    Returns:
+    - key (tuple): Hashable cache key.
+    """
+    return (tuple(dimension), scale, seed, algorithm)
+
+# The module generator is safe to share between threads, every call has its own lattice and output
+def _generate_parallel(width, height, scale, seed, cpu_count, stats):
+    from perlin_noise_parallel import get_generator
+    return get_generator(cpu_count, stats).generate(width, height, scale, seed, stats=stats)
+
+def _generate_vectorized(width, height, scale, seed, cpu_count, stats):
+    from perlin_noise_vectorized import generate_perlin_noise
+    return generate_perlin_noise(width, height, scale, seed=seed)
+
+def _generate_simplex(width, height, scale, seed, cpu_count, stats):
+    from perlin_noise_parallel import get_generator
+    return get_generator(cpu_count, stats).generate_simplex(width, height, scale, seed, stats=stats)
+
+# Algorithms cached_generate can run, by name
+ALGORITHMS = {
+    "parallel": _generate_parallel,
+    "vectorized": _generate_vectorized,
+    "simplex": _generate_simplex,
+}
+
+# Cache shared by every caller that does not bring its own
+default_cache = NoiseCache()
+
+def cached_generate(width, height, scale, seed=0, algorithm="parallel", cpu_count=3, cache=None, stats=None):
+    """
+    Generate Perlin noise, or return the cached map of the same parameters.
+
+    Parameters:
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (int): Scale factor for generating the noise.
+    - seed (int): Seed of the gradient lattice.
+    - algorithm (str): Name of the algorithm in ALGORITHMS.
+    - cpu_count (int): Number of parallel processes for algorithms that use them.
+    - cache (NoiseCache): Cache to use, defaults to default_cache.
+    - stats (GenerationStats): Optional collector of the generation timings, untouched on a hit.
+
+    Returns:
+    - noise (n-dimensional array): Read only Perlin noise array of shape (height, width).
+    """
+    if cache is None:
+        cache = default_cache
+    key = cache_key((width, height), scale, seed, algorithm)
+    noise = cache.get(key)
+    if noise is None:
+        noise = cache.put(key, ALGORITHMS[algorithm](width, height, scale, seed, cpu_count, stats))
+    return noise
@@ -1,20 +1,14 @@
 # Source: https://github.com/Vitosh/Python_personal/blob/master/JupyterNotebook/Perlin-Noise/Perlin-Noise.ipynb
+# pycuda is imported and the kernel compiled on first use, so importing this module needs no GPU
 
-import math
-import random
 import numpy as np
-import matplotlib.pyplot as plt
-import pycuda.driver as cuda
-import pycuda.autoinit, pycuda.compiler
 
-def plot_noise(noise, plt_title, cmap_given = "gray"):
-    plt.imshow(noise, cmap=cmap_given, interpolation='nearest')
-    #plt.colorbar()
-    plt.title(plt_title)
-    plt.show()
+# CUDA 10+ supports maximum 1024 Threads - max sized noise map is 32x32
+HEIGHT = 32
+WIDTH = 32
+SCALE = 10
 
-mod = pycuda.compiler.SourceModule("""
-#include <stdio.h>
+KERNEL_SOURCE = """
 __device__ float smoothstep(float t) {
   return t * t * (3 - 2 * t);
 }
@@ -25,7 +19,6 @@ __global__ void generate_perlin_noise(float *noise, float *gradients, int scale)
   const int x = threadIdx.x;
   const int y = threadIdx.y;
   int idx = threadIdx.x + threadIdx.y*32;
-  printf("I am %d.%d\\n", threadIdx.x, threadIdx.y);
 
   int cell_x = x / scale;
   int cell_y = y / scale;
@@ -47,31 +40,63 @@ __global__ void generate_perlin_noise(float *noise, float *gradients, int scale)
   noise[idx] = interpolated_value;
 
 }
-""")
+"""
 
-# CUDA 10+ supports maximum 1024 Threads - max sized noise map is 32x32
-HEIGHT = 32
-WIDTH = 32
-SCALE = np.int32(10)
+_kernel = None
+
+def plot_noise(noise, plt_title, cmap_given = "gray"):
+    # Import matplotlib left here, as plotting not necessary to noise gen
+    import matplotlib.pyplot as plt
+    plt.imshow(noise, cmap=cmap_given, interpolation='nearest')
+    #plt.colorbar()
+    plt.title(plt_title)
+    plt.show()
+
+def get_kernel():
+    """
+    Compile the noise kernel once, creating the CUDA context on first use.
+
+    Returns:
+    - kernel (pycuda.driver.Function): The generate_perlin_noise kernel.
+    """
+    global _kernel
+    if _kernel is None:
+        import pycuda.autoinit, pycuda.compiler
+        _kernel = pycuda.compiler.SourceModule(KERNEL_SOURCE).get_function("generate_perlin_noise")
+    return _kernel
+
+def generate_perlin_noise():
+    """
+    Generate Perlin noise on the GPU, one thread per pixel in a single block.
+
+    The kernel indexes with the WIDTH, HEIGHT and SCALE constants, so the map is always that size.
+
+    Returns:
+    - noise (n-dimensional array): float32 Perlin noise array of shape (HEIGHT, WIDTH), normalized to [0, 1].
+    """
+    import pycuda.driver as cuda
+    kernel = get_kernel()
+
+    a = np.random.randn(HEIGHT, WIDTH).astype(np.float32)
+    gradients = np.random.randn(HEIGHT // SCALE + 2, WIDTH // SCALE + 2, 2).astype(np.float32)
 
-a = np.random.randn(HEIGHT,WIDTH).astype(np.float32)
-gradients = np.random.randn(HEIGHT // SCALE + 2, WIDTH // SCALE + 2, 2).astype(np.float32)
+    a_dev = cuda.mem_alloc(a.nbytes)
+    b_dev = cuda.mem_alloc(gradients.nbytes)
 
-a_dev = cuda.mem_alloc(a.nbytes)
-b_dev = cuda.mem_alloc(gradients.nbytes)
+    cuda.memcpy_htod(a_dev, a)
+    cuda.memcpy_htod(b_dev, gradients)
 
-cuda.memcpy_htod(a_dev, a)
-cuda.memcpy_htod(b_dev, gradients)
+    kernel(a_dev, b_dev, np.int32(SCALE), block=(HEIGHT, WIDTH, 1))
+    cuda.Context.synchronize() # May not be necessary?
 
-func = mod.get_function("generate_perlin_noise")
-func(a_dev, b_dev, SCALE, block=(HEIGHT,WIDTH,1))
-cuda.Context.synchronize() # May not be necessary?
+    a_result = np.empty_like(a)
+    cuda.memcpy_dtoh(a_result, a_dev)
 
-a_result = np.empty_like(a)
-cuda.memcpy_dtoh(a_result, a_dev)
-print ("Output Matrix")
-print(a_result)
+    # Normalize
+    return (a_result - np.min(a_result)) / (np.max(a_result) - np.min(a_result))
 
-# Normalize
-noise = (a_result - np.min(a_result)) / (np.max(a_result) - np.min(a_result))
-plot_noise(noise, "Perlin noise example", cmap_given = "terrain")
\ No newline at end of file
+if __name__ == '__main__':
+    noise = generate_perlin_noise()
+    print ("Output Matrix")
+    print(noise)
+    plot_noise(noise, "Perlin noise example", cmap_given = "terrain")
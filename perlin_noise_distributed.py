@@ -0,0 +1,383 @@
+""" Distributed rendering of noise maps, a coordinator handing tiles to workers over TCP
+
+Usage:
+    python perlin_noise_distributed.py worker --port 9001
+    python perlin_noise_distributed.py render noise.npy --width 65536 --height 65536 --workers host1:9001,host2:9001
+    python perlin_noise_distributed.py render noise.npy --width 16384 --height 16384 --local 4
+
+Workers listen on a port and render map tiles from the hashed lattice of perlin_noise_tiles or
+simplex_noise, which needs only the seed, so a tile is the same on every machine. Connections
+are authenticated with a shared key by multiprocessing.connection, and messages are JSON headers
+and raw bytes, never pickles, so a peer can only ask for tiles. Workers refuse to listen beyond
+the loopback interface with the default key. Tiles travel zlib compressed, the coordinator
+writes them into a .npy memmap as they arrive, and tiles of a worker that fails, times out or
+disconnects are put back in the queue for the other workers.
+"""
+import json
+import socket
+import ipaddress
+import sys
+import time
+import zlib
+import queue
+import argparse
+import threading
+import multiprocessing
+from multiprocessing.connection import Listener, Client
+import numpy as np
+
+# Width and height of the tiles handed out by default
+TILE_SIZE = 1024
+# Shared key of the coordinator and workers, only accepted for workers on the loopback interface
+DEFAULT_AUTHKEY = b"perlin-noise"
+# Algorithms and data types a worker renders, anything else in a request is an error
+ALGORITHMS = ("perlin", "simplex")
+DTYPES = ("float32", "float64")
+# Seconds to wait for a tile before the worker is considered lost
+DEFAULT_TIMEOUT = 60.0
+
+def render_region(algorithm, seed, scale, x_start, y_start, width, height, dtype, level=1):
+    """
+    Render one rectangle of the map to compressed bytes, runs on a worker.
+
+    Parameters:
+    - algorithm (str): "perlin" or "simplex".
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor for generating the noise.
+    - x_start (int): Map column of the left edge.
+    - y_start (int): Map row of the top edge.
+    - width (int): Width of the rectangle.
+    - height (int): Height of the rectangle.
+    - dtype (str): "float32" or "float64", the data type of the result.
+    - level (int): zlib compression level, 1 is fastest.
+
+    Returns:
+    - data (bytes): zlib compressed C order noise of shape (height, width), normalized with the
+      theoretical range so tiles are seamless.
+    """
+    if algorithm not in ALGORITHMS or dtype not in DTYPES:
+        raise ValueError(f"Unsupported algorithm or dtype: {algorithm}, {dtype}")
+    if algorithm == "simplex":
+        from simplex_noise import region
+    else:
+        from perlin_noise_tiles import region
+    noise = region(seed, scale, x_start, y_start, width, height, np.dtype(dtype))
+    return zlib.compress(noise.tobytes(), level)
+
+def is_loopback(host):
+    # Whether a host name or address only reaches this machine
+    try:
+        return ipaddress.ip_address(socket.gethostbyname(host)).is_loopback
+    except (OSError, ValueError):
+        return False
+
+def send_message(connection, header, data=None):
+    # JSON header, then the raw payload when there is one
+    header = dict(header, data=data is not None)
+    connection.send_bytes(json.dumps(header).encode())
+    if data is not None:
+        connection.send_bytes(data)
+
+def receive_message(connection):
+    # (header, payload or None), see send_message
+    header = json.loads(connection.recv_bytes().decode())
+    if not isinstance(header, dict):
+        raise ValueError("Message header must be a JSON object")
+    return header, connection.recv_bytes() if header.get("data") else None
+
+def serve_worker(host="127.0.0.1", port=9001, authkey=DEFAULT_AUTHKEY, ready=None, fail_rate=0.0):
+    """
+    Serve tiles to coordinators, one connection at a time, until a coordinator sends "shutdown".
+
+    Requests are JSON headers {"type": "tile", "task": [x_start, y_start, width, height],
+    "algorithm", "seed", "scale", "dtype"}, answered with {"task", "error": null} and the
+    compressed tile, or {"task", "error": message}. {"type": "close"} ends the connection.
+
+    Parameters:
+    - host (str): Interface to listen on.
+    - port (int): Port to listen on, 0 picks a free port.
+    - authkey (bytes): Shared key, connections without it are refused. Other interfaces than
+      loopback need a key of your own.
+    - ready (multiprocessing.Connection): Optional pipe the listening (host, port) is sent to.
+    - fail_rate (float): Fraction of tasks answered with an error, to exercise retries.
+    """
+    if authkey == DEFAULT_AUTHKEY and not is_loopback(host):
+        raise ValueError(f"Listening on {host} needs an authkey of your own, the default key is public")
+    failures = np.random.default_rng()
+    with Listener((host, port), authkey=authkey) as listener:
+        if ready is not None:
+            ready.send(listener.address)
+            ready.close()
+        while True:
+            try:
+                connection = listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                continue
+            with connection:
+                while True:
+                    try:
+                        message, _ = receive_message(connection)
+                    except (EOFError, OSError, ValueError):
+                        break
+                    kind = message.get("type")
+                    if kind == "shutdown":
+                        return
+                    if kind != "tile":
+                        break
+                    task = message.get("task")
+                    try:
+                        if failures.random() < fail_rate:
+                            raise RuntimeError("injected failure")
+                        x_start, y_start, width, height = (int(value) for value in task)
+                        data = render_region(message["algorithm"], int(message["seed"]), float(message["scale"]),
+                                             x_start, y_start, width, height, message["dtype"])
+                        send_message(connection, {"task": task, "error": None}, data)
+                    except (EOFError, OSError):
+                        break
+                    except Exception as error:
+                        try:
+                            send_message(connection, {"task": task, "error": f"{type(error).__name__}: {error}"})
+                        except (EOFError, OSError):
+                            break
+
+def start_local_workers(count, host="127.0.0.1", authkey=DEFAULT_AUTHKEY, fail_rate=0.0):
+    """
+    Start worker processes on this machine, each listening on its own free port.
+
+    Parameters:
+    - count (int): Number of workers.
+    - host (str): Interface the workers listen on.
+    - authkey (bytes): Shared key.
+    - fail_rate (float): Fraction of tasks the workers fail on purpose, see serve_worker.
+
+    Returns:
+    - workers (list): (process, (host, port)) of every worker, terminate the processes when done.
+    """
+    workers = []
+    for _ in range(count):
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        process = multiprocessing.Process(target=serve_worker, args=(host, 0, authkey, sender, fail_rate), daemon=True)
+        process.start()
+        sender.close()
+        workers.append((process, receiver.recv()))
+        receiver.close()
+    return workers
+
+def parse_address(address):
+    # "host:port" -> (host, port)
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+class Coordinator:
+    """
+    Splits maps into tiles and renders them on remote workers, one connection and one tile in
+    flight per worker, so faster workers take more tiles.
+    """
+
+    def __init__(self, addresses, authkey=DEFAULT_AUTHKEY, retries=3, timeout=DEFAULT_TIMEOUT):
+        """
+        Parameters:
+        - addresses (list): (host, port) of every worker.
+        - authkey (bytes): Shared key of the workers.
+        - retries (int): Times a tile is handed out again after failing before the render fails.
+        - timeout (float): Seconds to wait for one tile.
+        """
+        self.addresses = list(addresses)
+        self.authkey = authkey
+        self.retries = retries
+        self.timeout = timeout
+        # Counters of the last render
+        self.completed = 0
+        self.retried = 0
+        self.compressed_bytes = 0
+        self.lost_workers = []
+
+    def render(self, path, width, height, scale, seed=0, algorithm="perlin", tile_size=TILE_SIZE, dtype=np.float32):
+        """
+        Render a map into a .npy file.
+
+        Parameters:
+        - path (str): Output .npy file.
+        - width (int): Width of the map.
+        - height (int): Height of the map.
+        - scale (float): Scale factor for generating the noise.
+        - seed (int): Seed of the lattice.
+        - algorithm (str): "perlin" or "simplex".
+        - tile_size (int): Width and height of the tiles handed to workers.
+        - dtype (data-type): np.float32 or np.float64.
+
+        Returns:
+        - noise (np.memmap): Memory mapped map of shape (height, width), normalized with the theoretical range.
+        """
+        output = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=(height, width))
+        tasks = queue.Queue()
+        for y_start in range(0, height, tile_size):
+            for x_start in range(0, width, tile_size):
+                tasks.put((x_start, y_start, min(tile_size, width - x_start), min(tile_size, height - y_start)))
+        total = tasks.qsize()
+        self.completed = self.retried = self.compressed_bytes = 0
+        self.lost_workers = []
+        attempts = {}
+        lock = threading.Lock()
+        failed = []
+
+        def fail(task, reason):
+            # Back in the queue for any worker, unless it has failed too often
+            with lock:
+                attempts[task] = attempts.get(task, 0) + 1
+                if attempts[task] > self.retries:
+                    failed.append(f"tile {task} failed {attempts[task]} times, last: {reason}")
+                    return
+                self.retried += 1
+            tasks.put(task)
+
+        def drive(address):
+            try:
+                connection = Client(address, authkey=self.authkey)
+            except (OSError, multiprocessing.AuthenticationError) as error:
+                with lock:
+                    self.lost_workers.append((address, str(error)))
+                return
+            with connection:
+                while not failed:
+                    with lock:
+                        if self.completed == total:
+                            break
+                    try:
+                        task = tasks.get(timeout=0.1)
+                    except queue.Empty:
+                        continue
+                    x_start, y_start, tile_width, tile_height = task
+                    try:
+                        send_message(connection, {"type": "tile", "task": list(task), "algorithm": algorithm, "seed": seed,
+                                                  "scale": scale, "dtype": np.dtype(dtype).name})
+                        if not connection.poll(self.timeout):
+                            raise TimeoutError(f"no reply in {self.timeout} seconds")
+                        reply, data = receive_message(connection)
+                        if reply.get("task") != list(task):
+                            raise ValueError(f"reply for tile {reply.get('task')} instead of {list(task)}")
+                        error = reply.get("error")
+                        if error is None and data is None:
+                            raise ValueError("reply without tile data")
+                    except (OSError, EOFError, TimeoutError, ValueError) as error:
+                        # The connection can not be trusted anymore, leave the rest to the other workers
+                        fail(task, f"{address}: {error}")
+                        with lock:
+                            self.lost_workers.append((address, f"{type(error).__name__}: {error}"))
+                        return
+                    if error is not None:
+                        fail(task, f"{address}: {error}")
+                        continue
+                    tile = np.frombuffer(zlib.decompress(data), dtype=dtype).reshape(tile_height, tile_width)
+                    output[y_start:y_start + tile_height, x_start:x_start + tile_width] = tile
+                    with lock:
+                        self.completed += 1
+                        self.compressed_bytes += len(data)
+                try:
+                    send_message(connection, {"type": "close"})
+                except OSError:
+                    pass
+
+        threads = [threading.Thread(target=drive, args=(address,), daemon=True) for address in self.addresses]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if failed:
+            raise RuntimeError(failed[0])
+        if self.completed < total:
+            raise RuntimeError(f"{total - self.completed} of {total} tiles not rendered, every worker was lost: {self.lost_workers}")
+        output.flush()
+        return output
+
+    def shutdown_workers(self):
+        # Ask every worker to exit, workers already gone are skipped
+        for address in self.addresses:
+            try:
+                with Client(address, authkey=self.authkey) as connection:
+                    send_message(connection, {"type": "shutdown"})
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                pass
+
+def generate_distributed(path, width, height, scale, addresses, seed=0, algorithm="perlin", tile_size=TILE_SIZE,
+                         dtype=np.float32, authkey=DEFAULT_AUTHKEY, retries=3, timeout=DEFAULT_TIMEOUT):
+    """
+    Render a map into a .npy file on remote workers, see Coordinator.
+
+    Parameters:
+    - path (str): Output .npy file.
+    - width (int): Width of the map.
+    - height (int): Height of the map.
+    - scale (float): Scale factor for generating the noise.
+    - addresses (list): (host, port) of every worker.
+    - seed (int): Seed of the lattice.
+    - algorithm (str): "perlin" or "simplex".
+    - tile_size (int): Width and height of the tiles handed to workers.
+    - dtype (data-type): np.float32 or np.float64.
+    - authkey (bytes): Shared key of the workers.
+    - retries (int): Times a failed tile is handed out again.
+    - timeout (float): Seconds to wait for one tile.
+
+    Returns:
+    - noise (np.memmap): Memory mapped map of shape (height, width).
+    """
+    coordinator = Coordinator(addresses, authkey, retries, timeout)
+    return coordinator.render(path, width, height, scale, seed, algorithm, tile_size, dtype)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    worker_parser = commands.add_parser("worker", help="Serve tiles to coordinators")
+    worker_parser.add_argument("--host", default="127.0.0.1")
+    worker_parser.add_argument("--port", type=int, default=9001)
+    worker_parser.add_argument("--authkey", help="Shared key, required to listen beyond loopback")
+
+    render_parser = commands.add_parser("render", help="Render a map into a .npy file")
+    render_parser.add_argument("path")
+    render_parser.add_argument("--width", type=int, required=True)
+    render_parser.add_argument("--height", type=int, required=True)
+    render_parser.add_argument("--scale", type=float, default=100)
+    render_parser.add_argument("--seed", type=int, default=0)
+    render_parser.add_argument("--algorithm", choices=["perlin", "simplex"], default="perlin")
+    render_parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    render_parser.add_argument("--dtype", choices=["float32", "float64"], default="float32")
+    render_parser.add_argument("--workers", help="Comma separated host:port of running workers")
+    render_parser.add_argument("--local", type=int, default=0, help="Start this many workers on this machine")
+    render_parser.add_argument("--retries", type=int, default=3)
+    render_parser.add_argument("--timeout", type=float, default=DEFAULT_TIMEOUT)
+    render_parser.add_argument("--authkey", help="Shared key of the workers")
+
+    args = parser.parse_args(argv)
+    authkey = DEFAULT_AUTHKEY if args.authkey is None else args.authkey.encode()
+    if args.command == "worker":
+        if args.authkey is None and not is_loopback(args.host):
+            parser.error(f"listening on {args.host} needs --authkey, the default key is public")
+        try:
+            serve_worker(args.host, args.port, authkey)
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    addresses = [parse_address(address) for address in args.workers.split(",")] if args.workers else []
+    local = start_local_workers(args.local, authkey=authkey)
+    addresses += [address for _, address in local]
+    if not addresses:
+        parser.error("render needs --workers or --local")
+    coordinator = Coordinator(addresses, authkey, args.retries, args.timeout)
+    try:
+        start = time.time()
+        coordinator.render(args.path, args.width, args.height, args.scale, args.seed, args.algorithm,
+                           args.tile_size, args.dtype)
+        total = time.time() - start
+        print(f"{coordinator.completed} tiles on {len(addresses)} workers took: {total:.6f}Seconds, "
+              f"{args.width * args.height / total / 1e6:.1f} MP/s, {coordinator.retried} retried, "
+              f"{coordinator.compressed_bytes / 1e6:.1f} MB received")
+    finally:
+        for process, _ in local:
+            process.terminate()
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
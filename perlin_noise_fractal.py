@@ -0,0 +1,90 @@
+# Fractal (fBm) Perlin noise, octaves of the hashed lattice noise summed into one buffer
+# Octave o has scale / lacunarity**o and amplitude persistence**o, each octave has its own
+# lattice seed so octaves do not line up. Built on perlin_noise_tiles, so fractal regions
+# are seamless too.
+
+import numpy as np
+from perlin_noise_vectorized import PERLIN_BOUND
+from perlin_noise_tiles import hash_coordinates, region
+
+def octave_seed(seed, octave):
+    """
+    Lattice seed of one octave.
+
+    Parameters:
+    - seed (int): Seed of the fractal noise.
+    - octave (int): Octave number, 0 is the coarsest.
+
+    Returns:
+    - seed (int): Seed of the octave lattice.
+    """
+    return int(np.asarray(hash_coordinates(seed, octave)).view(np.int64))
+
+def fractal_bound(octaves, persistence):
+    """
+    Largest |value| of fractal noise, the sum of the octave bounds.
+
+    Parameters:
+    - octaves (int): Number of octaves.
+    - persistence (float): Amplitude factor between octaves.
+
+    Returns:
+    - bound (float): Theoretical bound of the raw fractal noise.
+    """
+    return PERLIN_BOUND * sum(persistence ** octave for octave in range(octaves))
+
+def fractal_region(seed, scale, x_start, y_start, width, height, octaves=6, lacunarity=2.0, persistence=0.5,
+                   dtype=np.float64, normalize=True, out=None, scratch=None):
+    """
+    Fractal noise of any rectangle of the unbounded map of a seed.
+
+    Parameters:
+    - seed (int): Seed of the fractal noise.
+    - scale (float): Scale factor of the coarsest octave.
+    - x_start (int): Map column of the left edge, may be negative.
+    - y_start (int): Map row of the top edge, may be negative.
+    - width (int): Width of the rectangle.
+    - height (int): Height of the rectangle.
+    - octaves (int): Number of octaves.
+    - lacunarity (float): Frequency factor between octaves.
+    - persistence (float): Amplitude factor between octaves.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Map the theoretical range, see fractal_bound, to [0, 1], otherwise return raw values.
+    - out (n-dimensional array): Optional (height, width) destination, its dtype overrides dtype.
+    - scratch (n-dimensional array): Optional buffer like out, reused for every octave.
+
+    Returns:
+    - noise (n-dimensional array): Fractal noise array of shape (height, width), out when given.
+    """
+    noise = np.zeros((height, width), dtype=dtype) if out is None else out
+    noise[...] = 0
+    if scratch is None:
+        scratch = np.empty_like(noise)
+
+    # Accumulate every octave into the same buffer, one scratch layer at a time
+    amplitude = 1.0
+    for octave in range(octaves):
+        region(octave_seed(seed, octave), scale / lacunarity ** octave, x_start, y_start, width, height,
+               normalize=False, out=scratch)
+        scratch *= amplitude
+        noise += scratch
+        amplitude *= persistence
+
+    if normalize:
+        bound = fractal_bound(octaves, persistence)
+        noise += bound
+        noise /= 2 * bound
+    return noise
+
+if __name__ == '__main__':
+    # Demo Usage
+    import time
+    width = height = 1024
+    scale = 200
+
+    start = time.time()
+    noise = fractal_region(0, scale, 0, 0, width, height, octaves=8)
+    print(f"8 octaves {width} x {height} took: {time.time() - start:.6f}Seconds")
+
+    from perlin_noise_parallel import plot_noise
+    plot_noise(noise, "Fractal Perlin noise example", cmap_given="terrain")
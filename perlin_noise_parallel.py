@@ -2,9 +2,37 @@
 # Vitosh Academy Introduction: https://www.youtube.com/watch?v=5ojp-KPDsLk
 # Source: https://github.com/Vitosh/Python_personal/blob/master/JupyterNotebook/Perlin-Noise/Perlin-Noise.ipynb
 
+import os
+import math
+import mmap
+import time
+import pickle
+import atexit
+import weakref
+import tempfile
+import threading
 import numpy as np
-from multiprocessing import Pool
+from multiprocessing import Pool, cpu_count as available_cpu_count, resource_tracker
+from multiprocessing.pool import ThreadPool
 import multiprocessing.shared_memory
+from perlin_noise_vectorized import make_gradients, block_rows_for, axis_table, slice_table, compute_block
+from perlin_noise_vectorized import is_quantized, analytic_range, compute_quantized_block
+from perlin_noise_tiles import tile
+from perlin_noise_fractal import fractal_region
+from perlin_noise_batch import batch_gradients, fill_maps
+import simplex_noise
+from perlin_noise_stats import NullStats, WorkerTimer
+
+# Number of bands handed to each worker per call, more bands balance load better
+BANDS_PER_WORKER = 4
+# Worker pool kinds of PerlinGenerator
+BACKENDS = ("process", "thread")
+# Tile functions of PerlinGenerator.tiles, by algorithm name
+TILE_ALGORITHMS = {"perlin": tile, "simplex": simplex_noise.tile}
+# Directory of shared output arrays, the shared memory filesystem when there is one
+SHARED_DIR = "/dev/shm" if os.path.isdir("/dev/shm") else None
+# Finalizers of the shared array files still on disk, by path
+_shared_files = {}
 
 def plot_noise(noise, plt_title, cmap_given="gray"):
     # Import matplotlib left here, as plotting not necessary to noise gen
@@ -13,67 +41,736 @@ def plot_noise(noise, plt_title, cmap_given="gray"):
     plt.title(plt_title)
     plt.show()
 
-def smoothstep(t):
-    return t * t * (3 - 2 * t)
+def create_shared_array(shape, dtype=np.float64):
+    """
+    Create an array that worker processes can write into without copies.
+
+    The array is a np.memmap on a file in the shared memory filesystem when there is one,
+    the file is removed once the array is garbage collected or release_shared_array is called.
+    Files in /dev/shm are also registered with the resource tracker, which removes them
+    if this process dies before it could.
 
-def lerp(a, b, t):
-    return a + t * (b - a)
+    Parameters:
+    - shape (tuple): Shape of the array.
+    - dtype (data-type): Data type of the array.
 
-def compute_row(y, width, height, scale, gradients, shared_memory_name, shared_memory_dtype):
+    Returns:
+    - array (np.memmap): Zero filled shared array, usable as out= of PerlinGenerator.generate.
     """
-    Compute row of Perlin noise, using global gradients
+    fd, path = tempfile.mkstemp(prefix="perlin_", suffix=".dat", dir=SHARED_DIR)
+    os.close(fd)
+    array = np.memmap(path, dtype=dtype, mode="w+", shape=shape)
+    if _tracked(path):
+        resource_tracker.register(_tracker_name(path), "shared_memory")
+    _shared_files[path] = weakref.finalize(array, _remove_file, path)
+    return array
+
+def release_shared_array(array):
+    """
+    Remove the file of a shared array right away, the array itself stays usable in this process.
+
+    Workers can no longer attach to it, so it is then copied into when passed as out=.
 
     Parameters:
-    - y (int): Which row to be computed.
-    - width (int): Width of the noise array.
+    - array (np.memmap): Array from create_shared_array.
+    """
+    finalizer = _shared_files.get(array.filename)
+    if finalizer is not None:
+        finalizer()
+
+def _tracked(path):
+    # The tracker frees "shared_memory" names with shm_unlink, which maps them to /dev/shm on Linux
+    return os.name == "posix" and os.path.dirname(path) == "/dev/shm"
+
+def _tracker_name(path):
+    return "/" + os.path.basename(path)
+
+def _remove_file(path):
+    _shared_files.pop(path, None)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    if _tracked(path):
+        resource_tracker.unregister(_tracker_name(path), "shared_memory")
+
+def shared_location(array):
+    """
+    Location of a memory mapped array that workers can attach to.
+
+    Parameters:
+    - array (n-dimensional array): Array to locate.
+
+    Returns:
+    - location (tuple): (filename, inode, offset, shape, dtype str), or None when the array
+      is not a whole, writable, C contiguous np.memmap of a file.
+    """
+    # Slices of a memmap keep the parent's offset, only the mapping itself can be located
+    if not isinstance(array, np.memmap) or not isinstance(array.base, mmap.mmap) or array.filename is None:
+        return None
+    if not array.flags.c_contiguous or not array.flags.writeable:
+        return None
+    try:
+        inode = os.stat(array.filename).st_ino
+    except OSError:
+        # File already released, see release_shared_array
+        return None
+    return (array.filename, inode, array.offset, array.shape, array.dtype.str)
+
+def _detach_lattice(segment):
+    # Close a task's lattice segment, views still held by a failing task's traceback keep it
+    # mapped until they are collected
+    try:
+        segment.close()
+    except BufferError:
+        pass
+
+def _attach_output(location):
+    """
+    Map the output array for one task, the mapping is released when the task returns.
+
+    Parameters:
+    - location (tuple): Output location from shared_location.
+
+    Returns:
+    - array (np.memmap): Output array mapped in this worker.
+    """
+    filename, _, offset, shape, dtype = location
+    return np.memmap(filename, dtype=np.dtype(dtype), mode="r+", offset=offset, shape=shape)
+
+def fill_band(gradients, noise, y_start, y_stop, scale, timer, value_range=None):
+    """
+    Compute a band of rows of Perlin noise into an output array, for either backend.
+
+    Parameters:
+    - gradients (n-dimensional array): Gradient lattice of the whole array.
+    - noise (n-dimensional array): Output array of shape (height, width).
+    - y_start (int): First row of the band.
+    - y_stop (int): Row after the last row of the band.
     - scale (int): Scale factor for generating the noise.
-    
+    - timer (WorkerTimer): Collector of the band timings.
+    - value_range (tuple): Raw range of a quantized output, see perlin_noise_vectorized.quantize.
+
     Returns:
-    - row (1-dimensional array): Perlin noise array of length width.
+    - extrema (tuple): (min, max) of the band, so normalization needs no extra pass,
+      value_range itself for a quantized output that needs no normalization.
     """
+    height, width = noise.shape
+    band = noise[y_start:y_stop]
+    if is_quantized(noise.dtype):
+        with timer.phase("compute", band.nbytes):
+            # Float values only live in the block scratch, the band is written once in its final type
+            y_table = axis_table(0, height, scale, np.float32)
+            block_rows = block_rows_for(width)
+            scratch = np.empty(block_rows * width, dtype=np.float32)
+            for block_start in range(y_start, y_stop, block_rows):
+                block_stop = min(block_start + block_rows, y_stop)
+                compute_quantized_block(gradients, block_start, block_stop, width, scale, noise[block_start:block_stop],
+                                        value_range, scratch, y_table=slice_table(y_table, block_start, block_stop))
+        return value_range
+    with timer.phase("compute", band.nbytes):
+        # Vectorized kernel in cache sized blocks, written straight into the output,
+        # the axis tables stay cached in the worker between calls with the same parameters
+        y_table = axis_table(0, height, scale, noise.dtype)
+        block_rows = block_rows_for(width)
+        for block_start in range(y_start, y_stop, block_rows):
+            block_stop = min(block_start + block_rows, y_stop)
+            compute_block(gradients, block_start, block_stop, width, scale, noise[block_start:block_stop],
+                          y_table=slice_table(y_table, block_start, block_stop))
+    with timer.phase("extrema"):
+        return float(np.min(band)), float(np.max(band))
 
-    # Create a vector of x coordinates for the row
-    x = np.arange(width)
+def fill_fractal_band(noise, y_start, y_stop, seed, scale, octaves, lacunarity, persistence, timer):
+    """
+    Compute a band of rows of fractal noise, every octave, into an output array, for either backend.
 
-    # Compute the grid cell indices and fractional offsets
-    cell_x = x // scale
-    cell_y = y // scale  # Constant for the row
-    cell_offset_x = x / scale - cell_x
-    cell_offset_y = y / scale - cell_y  # Constant for the row
+    Parameters:
+    - noise (n-dimensional array): Output array of shape (height, width).
+    - y_start (int): First row of the band.
+    - y_stop (int): Row after the last row of the band.
+    - seed (int): Seed of the hashed lattices.
+    - scale (float): Scale factor of the coarsest octave.
+    - octaves (int): Number of octaves.
+    - lacunarity (float): Frequency factor between octaves.
+    - persistence (float): Amplitude factor between octaves.
+    - timer (WorkerTimer): Collector of the band timings.
 
+    Returns:
+    - extrema (tuple): (min, max) of the band.
+    """
+    band = noise[y_start:y_stop]
+    with timer.phase("compute", band.nbytes):
+        # Octave lattices are hashed, so bands need no shared lattice
+        fractal_region(seed, scale, 0, y_start, noise.shape[1], y_stop - y_start, octaves, lacunarity, persistence,
+                       normalize=False, out=band)
+    with timer.phase("extrema"):
+        return float(np.min(band)), float(np.max(band))
 
-    # Fetch the gradient vectors for the four cell corners in a vectorized way.
-    # gradients has shape (height//scale + 2, width//scale + 2, 2)
-    grad_tl = gradients[cell_y, cell_x]      # Top-left gradients, shape (width, 2)
-    grad_tr = gradients[cell_y, cell_x + 1]    # Top-right gradients
-    grad_bl = gradients[cell_y + 1, cell_x]    # Bottom-left gradients
-    grad_br = gradients[cell_y + 1, cell_x + 1]# Bottom-right gradients
+def fill_simplex_band(noise, y_start, y_stop, seed, scale, timer):
+    """
+    Compute a band of rows of raw simplex noise into an output array, for either backend.
 
-    # SIGNIFICANT numpy performance increase, by dot product on rows
-    # Compute the dot products in a vectorized fashion.
-    # Each dot product is computed as: (offset_x * grad_x) + (offset_y * grad_y)
-    dot_tl = cell_offset_x * grad_tl[:, 0] + cell_offset_y * grad_tl[:, 1]
-    dot_tr = (cell_offset_x - 1) * grad_tr[:, 0] + cell_offset_y * grad_tr[:, 1]
-    dot_bl = cell_offset_x * grad_bl[:, 0] + (cell_offset_y - 1) * grad_bl[:, 1]
-    dot_br = (cell_offset_x - 1) * grad_br[:, 0] + (cell_offset_y - 1) * grad_br[:, 1]
+    Parameters:
+    - noise (n-dimensional array): Output array of shape (height, width).
+    - y_start (int): First row of the band.
+    - y_stop (int): Row after the last row of the band.
+    - seed (int): Seed of the hashed lattice.
+    - scale (float): Scale factor for generating the noise.
+    - timer (WorkerTimer): Collector of the band timings.
 
-    # Compute the smooth interpolation weights
-    weight_x = smoothstep(cell_offset_x)
-    weight_y = smoothstep(cell_offset_y)
+    Returns:
+    - extrema (tuple): (min, max) of the band.
+    """
+    band = noise[y_start:y_stop]
+    with timer.phase("compute", band.nbytes):
+        simplex_noise.region(seed, scale, 0, y_start, noise.shape[1], y_stop - y_start, normalize=False, out=band)
+    with timer.phase("extrema"):
+        return float(np.min(band)), float(np.max(band))
 
-    # Interpolate horizontally for the top and bottom edges
-    interp_top = lerp(dot_tl, dot_tr, weight_x)
-    interp_bottom = lerp(dot_bl, dot_br, weight_x)
+def normalize_rows(band, array_min, divide_by, timer):
+    """
+    Normalize a band of rows in place, for either backend.
 
-    # Get shared memory
-    shared_memory = multiprocessing.shared_memory.SharedMemory(name=shared_memory_name)
-    shared_array = np.ndarray((height, width), dtype=shared_memory_dtype, buffer=shared_memory.buf)
+    Parameters:
+    - band (n-dimensional array): Rows to normalize.
+    - array_min (float): Minimum of the whole noise array.
+    - divide_by (float): Range of the whole noise array.
+    - timer (WorkerTimer): Collector of the band timings.
+    """
+    with timer.phase("normalize", band.nbytes):
+        band -= array_min
+        if divide_by:
+            band /= divide_by
+
+def compute_band(y_start, y_stop, scale, lattice_name, lattice_shape, location, value_range=None):
+    """
+    Compute a band of rows of Perlin noise into the shared output array, process backend task.
+
+    Parameters:
+    - y_start (int): First row of the band.
+    - y_stop (int): Row after the last row of the band.
+    - scale (int): Scale factor for generating the noise.
+    - lattice_name (str): Name of the lattice SharedMemory segment.
+    - lattice_shape (tuple): Shape of the gradient lattice.
+    - location (tuple): Output location from shared_location.
+    - value_range (tuple): Raw range of a quantized output, see fill_band.
+
+    Returns:
+    - result (tuple): (min, max) of the band, so normalization needs no extra pass, and the
+      worker timings for GenerationStats.merge_worker.
+    """
+    timer = WorkerTimer()
+    with timer.phase("attach"):
+        # Attached for this task only, the segment belongs to a single generate call
+        lattice = multiprocessing.shared_memory.SharedMemory(name=lattice_name)
+        noise = _attach_output(location)
+    try:
+        gradients = np.ndarray(lattice_shape, dtype=np.float64, buffer=lattice.buf)
+        return fill_band(gradients, noise, y_start, y_stop, scale, timer, value_range) + (timer.timings(),)
+    finally:
+        gradients = None
+        _detach_lattice(lattice)
+
+def compute_fractal_band(y_start, y_stop, seed, scale, octaves, lacunarity, persistence, location):
+    """
+    Compute a band of rows of fractal noise into the shared output array, process backend task.
 
-    # Interpolate vertically between the top and bottom interpolations    
-    shared_array[y,:] = lerp(interp_top, interp_bottom, weight_y)
-    shared_memory.close()
+    Parameters:
+    - y_start (int): First row of the band.
+    - y_stop (int): Row after the last row of the band.
+    - seed (int): Seed of the hashed lattices.
+    - scale (float): Scale factor of the coarsest octave.
+    - octaves (int): Number of octaves.
+    - lacunarity (float): Frequency factor between octaves.
+    - persistence (float): Amplitude factor between octaves.
+    - location (tuple): Output location from shared_location.
+
+    Returns:
+    - result (tuple): (min, max) of the band and the worker timings, see compute_band.
+    """
+    timer = WorkerTimer()
+    with timer.phase("attach"):
+        noise = _attach_output(location)
+    return fill_fractal_band(noise, y_start, y_stop, seed, scale, octaves, lacunarity, persistence, timer) + (timer.timings(),)
+
+def compute_simplex_band(y_start, y_stop, seed, scale, location):
+    """
+    Compute a band of rows of simplex noise into the shared output array, process backend task.
+
+    Parameters:
+    - y_start (int): First row of the band.
+    - y_stop (int): Row after the last row of the band.
+    - seed (int): Seed of the hashed lattice.
+    - scale (float): Scale factor for generating the noise.
+    - location (tuple): Output location from shared_location.
+
+    Returns:
+    - result (tuple): (min, max) of the band and the worker timings, see compute_band.
+    """
+    timer = WorkerTimer()
+    with timer.phase("attach"):
+        noise = _attach_output(location)
+    return fill_simplex_band(noise, y_start, y_stop, seed, scale, timer) + (timer.timings(),)
 
-def generate_perlin_noise(width, height, scale, cpu_count=3):
+def normalize_band(y_start, y_stop, location, array_min, divide_by):
+    """
+    Normalize a band of rows of the shared output array in place, process backend task.
+
+    Parameters:
+    - y_start (int): First row of the band.
+    - y_stop (int): Row after the last row of the band.
+    - location (tuple): Output location from shared_location.
+    - array_min (float): Minimum of the whole noise array.
+    - divide_by (float): Range of the whole noise array.
+
+    Returns:
+    - timings (tuple): Worker timings for GenerationStats.merge_worker.
+    """
+    timer = WorkerTimer()
+    with timer.phase("attach"):
+        band = _attach_output(location)[y_start:y_stop]
+    normalize_rows(band, array_min, divide_by, timer)
+    return timer.timings()
+
+def compute_maps(first, stop, scale, lattice_name, lattice_shape, location, normalize):
+    """
+    Compute whole maps of a batch into the shared output stack, process backend task.
+
+    Parameters:
+    - first (int): First map of the chunk.
+    - stop (int): Map after the last map of the chunk.
+    - scale (int): Scale factor for generating the noise.
+    - lattice_name (str): Name of the SharedMemory segment holding the stack of lattices.
+    - lattice_shape (tuple): Shape of the stack of lattices.
+    - location (tuple): Output location from shared_location.
+    - normalize (bool): Normalize every map to [0, 1].
+
+    Returns:
+    - timings (tuple): Worker timings for GenerationStats.merge_worker.
+    """
+    timer = WorkerTimer()
+    with timer.phase("attach"):
+        lattice = multiprocessing.shared_memory.SharedMemory(name=lattice_name)
+        maps = _attach_output(location)
+    try:
+        gradients = np.ndarray(lattice_shape, dtype=np.float64, buffer=lattice.buf)
+        with timer.phase("compute", maps[first:stop].nbytes):
+            fill_maps(gradients[first:stop], maps[first:stop], scale, normalize)
+        return timer.timings()
+    finally:
+        gradients = None
+        _detach_lattice(lattice)
+
+# Thread backend tasks, the arrays themselves are passed since threads share memory
+def _thread_compute_band(y_start, y_stop, scale, gradients, noise, value_range=None):
+    timer = WorkerTimer(threading.get_ident())
+    return fill_band(gradients, noise, y_start, y_stop, scale, timer, value_range) + (timer.timings(),)
+
+def _thread_compute_fractal_band(y_start, y_stop, seed, scale, octaves, lacunarity, persistence, noise):
+    timer = WorkerTimer(threading.get_ident())
+    return fill_fractal_band(noise, y_start, y_stop, seed, scale, octaves, lacunarity, persistence, timer) + (timer.timings(),)
+
+def _thread_compute_simplex_band(y_start, y_stop, seed, scale, noise):
+    timer = WorkerTimer(threading.get_ident())
+    return fill_simplex_band(noise, y_start, y_stop, seed, scale, timer) + (timer.timings(),)
+
+def _thread_compute_maps(first, stop, scale, gradients, maps, normalize):
+    timer = WorkerTimer(threading.get_ident())
+    with timer.phase("compute", maps[first:stop].nbytes):
+        fill_maps(gradients[first:stop], maps[first:stop], scale, normalize)
+    return timer.timings()
+
+def _thread_normalize_band(y_start, y_stop, noise, array_min, divide_by):
+    timer = WorkerTimer(threading.get_ident())
+    normalize_rows(noise[y_start:y_stop], array_min, divide_by, timer)
+    return timer.timings()
+
+def split_bands(height, width, processes):
+    """
+    Split rows into bands, sized so every worker gets a few bands of at least one kernel block.
+
+    Parameters:
+    - height (int): Height of the noise array.
+    - width (int): Width of the noise array.
+    - processes (int): Number of worker processes.
+
+    Returns:
+    - bands (list): List of (y_start, y_stop) tuples covering every row.
+    """
+    band_rows = max(block_rows_for(width), math.ceil(height / (processes * BANDS_PER_WORKER)))
+    return [(y_start, min(y_start + band_rows, height)) for y_start in range(0, height, band_rows)]
+
+def split_maps(count, processes):
+    """
+    Split a batch into chunks of whole maps, a few chunks per worker.
+
+    Parameters:
+    - count (int): Number of maps.
+    - processes (int): Number of workers.
+
+    Returns:
+    - chunks (list): List of (first, stop) tuples covering every map.
+    """
+    chunk = max(1, math.ceil(count / (processes * BANDS_PER_WORKER)))
+    return [(first, min(first + chunk, count)) for first in range(0, count, chunk)]
+
+class PerlinGenerator:
+    """
+    Long lived Perlin noise generator owning a reusable worker pool.
+
+    Use as a context manager, or call close() when done:
+        with PerlinGenerator(4) as generator:
+            noise = generator.generate(512, 512, 30)
+
+    The "process" backend runs bands in worker processes, through a shared lattice segment and
+    shared output. The "thread" backend runs them in threads of this process on the arrays
+    themselves, no segment, no pickling and no process startup: NumPy releases the GIL inside
+    the large array operations of the kernel, so threads scale too. Every call has its own
+    lattice and output, so threads of the caller can share one generator. Threads win for small and
+    medium maps and whenever pool startup counts, processes for large maps where the Python
+    overhead between NumPy calls starts to serialize threads. See perlin_performance.py.
+    """
+
+    def __init__(self, processes=None, backend="process"):
+        """
+        Parameters:
+        - processes (int): Number of worker processes or threads, defaults to every cpu.
+        - backend (str): "process" or "thread", see BACKENDS.
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend}")
+        self.processes = processes or available_cpu_count()
+        self.backend = backend
+        if backend == "thread":
+            self._pool = ThreadPool(processes=self.processes)
+            return
+        # Workers must share the owner's resource tracker, or a worker's tracker would
+        # unlink the lattice segment when that worker exits
+        if os.name == "posix":
+            resource_tracker.ensure_running()
+        self._pool = Pool(processes=self.processes)
+
+    def _share_lattice(self, gradients, stats):
+        # A segment of this call only, concurrent calls never overwrite a lattice still being read,
+        # freed with _release_lattice once the workers are done
+        with stats.phase("lattice copy", gradients.nbytes):
+            segment = multiprocessing.shared_memory.SharedMemory(create=True, size=max(gradients.nbytes, 1))
+            np.ndarray(gradients.shape, dtype=gradients.dtype, buffer=segment.buf)[...] = gradients
+        return segment
+
+    def _release_lattice(self, segment):
+        segment.close()
+        segment.unlink()
+
+    def generate(self, width, height, scale, seed=0, dtype=np.float64, out=None, stats=None, value_range=None):
+        """
+        Generate Perlin noise using the given parameters.
+
+        The lattice lives in a shared segment and workers write straight into the output,
+        which is normalized in place, so peak memory is one output array plus the lattice.
+        Quantized outputs, uint8, uint16 or float16, are normalized with a range known up front
+        and written in a single pass, with no normalize pass.
+
+        Parameters:
+        - width (int): Width of the noise array.
+        - height (int): Height of the noise array.
+        - scale (int): Scale factor for generating the noise.
+        - seed (int): Seed of the gradient lattice, must be the same to keep each run identical.
+        - dtype (data-type): np.float64 or np.float32 for the computation and result, or uint8, uint16 or
+          float16 for a quantized result, ignored with out.
+        - out (n-dimensional array): Optional (height, width) floating point or quantized destination. A np.memmap,
+          from create_shared_array or np.lib.format.open_memmap, is written without copies, any other
+          array is filled with one copy at the end. The thread backend writes any array without copies.
+        - stats (GenerationStats): Optional collector of per-phase and per-worker timings.
+        - value_range (tuple): (low, high) raw range of a quantized result, defaults to analytic_range.
+
+        Returns:
+        - noise (n-dimensional array): Perlin noise array of shape (height, width), out when given.
+        """
+        stats = NullStats() if stats is None else stats
+        noise, location = self._output((height, width), dtype, out, stats, quantized=True)
+
+        # Generate random gradients with dimensions based on the grid
+        with stats.phase("gradients"):
+            gradients = make_gradients(width, height, scale, seed)
+        if is_quantized(noise.dtype) and value_range is None:
+            value_range = analytic_range(gradients)
+        elif not is_quantized(noise.dtype):
+            value_range = None
+        bands = split_bands(height, width, self.processes)
+        if self.backend == "thread":
+            # Threads read the lattice and write the output directly
+            args = [(y_start, y_stop, scale, gradients, noise, value_range) for y_start, y_stop in bands]
+            results = self._dispatch(_thread_compute_band, args, stats)
+            return self._normalize(noise, location, bands, results, out, stats, value_range is not None)
+
+        # Processes need the lattice in a shared segment
+        lattice_mem = self._share_lattice(gradients, stats)
+        try:
+            # One task per band rather than per row
+            args = [(y_start, y_stop, scale, lattice_mem.name, gradients.shape, location, value_range) for y_start, y_stop in bands]
+            results = self._dispatch(compute_band, args, stats)
+        finally:
+            self._release_lattice(lattice_mem)
+        return self._normalize(noise, location, bands, results, out, stats, value_range is not None)
+
+    def generate_fractal(self, width, height, scale, octaves=6, lacunarity=2.0, persistence=0.5, seed=0, dtype=np.float64, out=None, stats=None):
+        """
+        Generate fractal (fBm) Perlin noise in a single parallel pass, see perlin_noise_fractal.
+
+        Every band accumulates all octaves into the shared output, and the sum is normalized once.
+
+        Parameters:
+        - width (int): Width of the noise array.
+        - height (int): Height of the noise array.
+        - scale (float): Scale factor of the coarsest octave.
+        - octaves (int): Number of octaves.
+        - lacunarity (float): Frequency factor between octaves.
+        - persistence (float): Amplitude factor between octaves.
+        - seed (int): Seed of the hashed lattices.
+        - dtype (data-type): np.float64 or np.float32 for the computation and result, ignored with out.
+        - out (n-dimensional array): Optional destination, see generate.
+        - stats (GenerationStats): Optional collector of per-phase and per-worker timings.
+
+        Returns:
+        - noise (n-dimensional array): Fractal noise array of shape (height, width) in [0, 1], out when given.
+        """
+        stats = NullStats() if stats is None else stats
+        noise, location = self._output((height, width), dtype, out, stats)
+        bands = split_bands(height, width, self.processes)
+        if self.backend == "thread":
+            args = [(y_start, y_stop, seed, scale, octaves, lacunarity, persistence, noise) for y_start, y_stop in bands]
+            results = self._dispatch(_thread_compute_fractal_band, args, stats)
+        else:
+            args = [(y_start, y_stop, seed, scale, octaves, lacunarity, persistence, location) for y_start, y_stop in bands]
+            results = self._dispatch(compute_fractal_band, args, stats)
+        return self._normalize(noise, location, bands, results, out, stats)
+
+    def generate_simplex(self, width, height, scale, seed=0, dtype=np.float64, out=None, stats=None):
+        """
+        Generate simplex noise in parallel, see simplex_noise, normalized to [0, 1] like generate.
+
+        Parameters:
+        - width (int): Width of the noise array.
+        - height (int): Height of the noise array.
+        - scale (float): Scale factor for generating the noise.
+        - seed (int): Seed of the hashed lattice.
+        - dtype (data-type): np.float64 or np.float32 for the computation and result, ignored with out.
+        - out (n-dimensional array): Optional destination, see generate.
+        - stats (GenerationStats): Optional collector of per-phase and per-worker timings.
+
+        Returns:
+        - noise (n-dimensional array): Simplex noise array of shape (height, width) in [0, 1], out when given.
+        """
+        stats = NullStats() if stats is None else stats
+        noise, location = self._output((height, width), dtype, out, stats)
+        bands = split_bands(height, width, self.processes)
+        if self.backend == "thread":
+            args = [(y_start, y_stop, seed, scale, noise) for y_start, y_stop in bands]
+            results = self._dispatch(_thread_compute_simplex_band, args, stats)
+        else:
+            args = [(y_start, y_stop, seed, scale, location) for y_start, y_stop in bands]
+            results = self._dispatch(compute_simplex_band, args, stats)
+        return self._normalize(noise, location, bands, results, out, stats)
+
+    def generate_batch(self, width, height, scale, seeds, count=None, dtype=np.float64, normalize=True, out=None, stats=None):
+        """
+        Generate a batch of Perlin noise maps, chunks of whole maps per worker, see perlin_noise_batch.
+
+        Parameters:
+        - width (int): Width of every noise map.
+        - height (int): Height of every noise map.
+        - scale (int): Scale factor for generating the noise.
+        - seeds (iterable or np.random.Generator): Seed of every map, or a Generator, see batch_gradients.
+        - count (int): Number of maps, required with a Generator.
+        - dtype (data-type): np.float64 or np.float32 for the computation and result, ignored with out.
+        - normalize (bool): Normalize every map to [0, 1] on its own.
+        - out (n-dimensional array): Optional (n, height, width) destination, see generate.
+        - stats (GenerationStats): Optional collector of per-phase and per-worker timings.
+
+        Returns:
+        - maps (n-dimensional array): Noise maps of shape (n, height, width), out when given.
+        """
+        stats = NullStats() if stats is None else stats
+        # Lattices are drawn here, so seeding stays local to the call and identical for any worker count
+        with stats.phase("gradients"):
+            gradients = batch_gradients(width, height, scale, seeds, count)
+        maps, location = self._output((len(gradients), height, width), dtype, out, stats)
+        chunks = split_maps(len(gradients), self.processes)
+        if self.backend == "thread":
+            args = [(first, stop, scale, gradients, maps, normalize) for first, stop in chunks]
+            results = self._dispatch(_thread_compute_maps, args, stats)
+        else:
+            lattice_mem = self._share_lattice(gradients, stats)
+            try:
+                args = [(first, stop, scale, lattice_mem.name, gradients.shape, location, normalize) for first, stop in chunks]
+                results = self._dispatch(compute_maps, args, stats)
+            finally:
+                self._release_lattice(lattice_mem)
+        for timings in results:
+            stats.merge_worker(timings)
+
+        # Maps are normalized on their own inside the tasks, no second pass
+        return self._copy_out(maps, out, stats)
+
+    def _dispatch(self, task, args, stats, phase="compute pass"):
+        # Time and bytes of pickling the task arguments sent to the workers, measured on a separate pickling
+        # only when the caller asked for stats, threads get their arguments as they are
+        if self.backend == "thread":
+            with stats.phase(phase):
+                return self._pool.starmap(task, args)
+        if not isinstance(stats, NullStats):
+            start = time.perf_counter()
+            nbytes = sum(len(pickle.dumps(arg)) for arg in args)
+            stats.add("task pickling", time.perf_counter() - start, len(args), nbytes)
+        with stats.phase(phase):
+            results = self._pool.starmap(task, args)
+        return results
+
+    def _output(self, shape, dtype, out, stats, quantized=False):
+        # Output the workers can attach to, the caller's buffer when possible,
+        # quantized outputs only for the methods that can write them
+        if self._pool is None:
+            raise ValueError("PerlinGenerator is closed")
+        if out is not None:
+            if out.shape != shape or not (np.issubdtype(out.dtype, np.floating) or is_quantized(out.dtype)):
+                raise ValueError(f"out must be a floating point or quantized array of shape {shape}")
+            dtype = out.dtype
+        if is_quantized(dtype) and not quantized:
+            raise ValueError(f"Quantized output ({np.dtype(dtype).name}) is only supported by generate, use float32 or float64")
+        if not (np.issubdtype(dtype, np.floating) or is_quantized(dtype)):
+            raise ValueError(f"Unsupported dtype: {np.dtype(dtype).name}")
+        nbytes = math.prod(shape) * np.dtype(dtype).itemsize
+        if self.backend == "thread":
+            # Threads share this process, any array is written in place
+            if out is not None:
+                return out, None
+            with stats.phase("output allocation", nbytes):
+                return np.empty(shape, dtype=dtype), None
+        noise = out
+        location = None if out is None else shared_location(out)
+        if location is None:
+            with stats.phase("output allocation", nbytes):
+                noise = create_shared_array(shape, dtype)
+                location = shared_location(noise)
+        return noise, location
+
+    def _normalize(self, noise, location, bands, results, out, stats, quantized=False):
+        # Normalize the noise to the range [0, 1] in place, using the band extrema,
+        # quantized outputs were already normalized by the workers
+        for *_, timings in results:
+            stats.merge_worker(timings)
+        if quantized:
+            return self._copy_out(noise, out, stats)
+        array_min = min(band_min for band_min, _, _ in results)
+        divide_by = max(band_max for _, band_max, _ in results) - array_min
+        if self.backend == "thread":
+            task = _thread_normalize_band
+            args = [(y_start, y_stop, noise, array_min, divide_by) for y_start, y_stop in bands]
+        else:
+            task = normalize_band
+            args = [(y_start, y_stop, location, array_min, divide_by) for y_start, y_stop in bands]
+        for timings in self._dispatch(task, args, stats, "normalize pass"):
+            stats.merge_worker(timings)
+        return self._copy_out(noise, out, stats)
+
+    def _copy_out(self, noise, out, stats):
+        # Outputs the workers could not attach to are filled with one copy
+        if out is not None and noise is not out:
+            with stats.phase("copy out", out.nbytes):
+                out[...] = noise
+            return out
+        if out is None and self.backend == "process":
+            # Workers are done with the output made for this call, its file can go now
+            release_shared_array(noise)
+        return noise
+
+    def tiles(self, seed, scale, coordinates, size, dtype=np.float64, algorithm="perlin"):
+        """
+        Compute tiles of the hashed lattice map of a seed in parallel, see perlin_noise_tiles.tile.
+
+        Tiles need no shared state, so each worker computes whole tiles on its own.
+
+        Parameters:
+        - seed (int): Seed of the lattice.
+        - scale (int): Scale factor for generating the noise.
+        - coordinates (iterable): (tx, ty) tile coordinates.
+        - size (int): Width and height of every tile.
+        - dtype (data-type): np.float64 or np.float32 for the computation and result.
+        - algorithm (str): "perlin" or "simplex", see TILE_ALGORITHMS.
+
+        Returns:
+        - tiles (list): Noise array of shape (size, size) for every coordinate, in order.
+        """
+        if self._pool is None:
+            raise ValueError("PerlinGenerator is closed")
+        return self._pool.starmap(TILE_ALGORITHMS[algorithm], [(seed, scale, tx, ty, size, dtype) for tx, ty in coordinates])
+
+    def worker_pids(self):
+        """
+        Process ids of the pool workers, none for the thread backend.
+
+        Returns:
+        - pids (list): Pid of every worker process.
+        """
+        if self.backend == "thread" or self._pool is None:
+            return []
+        return [process.pid for process in self._pool._pool]
+
+    def close(self):
+        """
+        Stop the worker pool.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+# Generator reused by generate_perlin_noise while the cpu count and backend stay the same
+_default_generator = None
+# Guards creating and replacing the module generator, reentrant as get_generator closes the old one
+_generator_lock = threading.RLock()
+
+def get_generator(cpu_count, stats=None, backend="process"):
+    """
+    Return the shared module level generator, recreated only when cpu_count or backend changes.
+
+    Parameters:
+    - cpu_count (int): Number of parallel processes or threads.
+    - stats (GenerationStats): Optional collector, records the pool startup when one happens.
+    - backend (str): "process" or "thread", see PerlinGenerator.
+
+    Returns:
+    - generator (PerlinGenerator): Generator with a pool of cpu_count workers.
+    """
+    global _default_generator
+    with _generator_lock:
+        if _default_generator is None or (_default_generator.processes, _default_generator.backend) != (cpu_count, backend):
+            close_generator()
+            start = time.perf_counter()
+            _default_generator = PerlinGenerator(cpu_count, backend)
+            if stats is not None:
+                stats.add("pool startup", time.perf_counter() - start)
+        return _default_generator
+
+@atexit.register
+def close_generator():
+    """
+    Close the module level generator, also done automatically at exit.
+    """
+    global _default_generator
+    with _generator_lock:
+        if _default_generator is not None:
+            _default_generator.close()
+            _default_generator = None
+
+def generate_perlin_noise(width, height, scale, cpu_count=3, stats=None, backend="process"):
     """
     Generate Perlin noise using the given parameters.
     
@@ -82,37 +779,73 @@ def generate_perlin_noise(width, height, scale, cpu_count=3):
     - height (int): Height of the noise array.
     - scale (int): Scale factor for generating the noise.
     - cpu_count (int) Number of parallel processes to run: 
+    - stats (GenerationStats): Optional collector of per-phase and per-worker timings.
+    - backend (str): "process" or "thread", see PerlinGenerator.
     
     Returns:
     - noise (n-dimensional array): Perlin noise array of shape (height, width).
     """
-    # Must be 0 to keep each run identical
-    np.random.seed(0)
+    # Pool is kept between calls, so repeated calls pay no process startup
+    return get_generator(cpu_count, stats, backend).generate(width, height, scale, stats=stats)
 
-    # Empty noise array for shared memory array
-    noise = np.zeros((height, width))
-    shared_mem = multiprocessing.shared_memory.SharedMemory(create=True, size=noise.nbytes)
-    shared_array = np.ndarray(noise.shape, dtype=noise.dtype, buffer=shared_mem.buf)
+def generate_noise_batch(width, height, scale, seeds, count=None, dtype=np.float64, cpu_count=3, stats=None, backend="process"):
+    """
+    Generate a batch of Perlin noise maps using the given parameters.
 
-    # Generate random gradients with dimensions based on the grid
-    gradients = np.random.randn(height // scale + 2, width // scale + 2, 2)
+    Parameters:
+    - width (int): Width of every noise map.
+    - height (int): Height of every noise map.
+    - scale (int): Scale factor for generating the noise.
+    - seeds (iterable or np.random.Generator): Seed of every map, or a Generator, see perlin_noise_batch.
+    - count (int): Number of maps, required with a Generator.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - cpu_count (int): Number of parallel processes to run.
+    - stats (GenerationStats): Optional collector of per-phase and per-worker timings.
+    - backend (str): "process" or "thread", see PerlinGenerator.
 
-    # Prepare arguments for each row, where y is row number, provide shared memory noise to each process
-    args = [(y, width, height, scale, gradients, shared_mem.name, noise.dtype) for y in range(height)]
+    Returns:
+    - maps (n-dimensional array): Noise maps of shape (n, height, width), each in [0, 1].
+    """
+    return get_generator(cpu_count, stats, backend).generate_batch(width, height, scale, seeds, count, dtype, stats=stats)
 
-    # Use multiprocessing Pool to compute each row in parallel
-    Pool(processes=cpu_count).starmap(compute_row, args)  # Starmap uses arg tuple as multiple arguments
+def generate_simplex_noise(width, height, scale, seed=0, cpu_count=3, stats=None, backend="process"):
+    """
+    Generate simplex noise using the given parameters, see simplex_noise.
 
-    # Normalize the noise to the range [0, 1]
-    array_min = np.min(shared_array)
-    divide_by = np.max(shared_array) - array_min
-    shared_array = (shared_array - array_min) # Set min to 0
-    shared_array /= divide_by # Set new max to 1 normalizing in between
-    
-    # Close memory
-    shared_mem.close()
-    shared_mem.unlink()    
-    return shared_array
+    Parameters:
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (float): Scale factor for generating the noise.
+    - seed (int): Seed of the hashed lattice.
+    - cpu_count (int): Number of parallel processes to run.
+    - stats (GenerationStats): Optional collector of per-phase and per-worker timings.
+    - backend (str): "process" or "thread", see PerlinGenerator.
+
+    Returns:
+    - noise (n-dimensional array): Simplex noise array of shape (height, width) in [0, 1].
+    """
+    return get_generator(cpu_count, stats, backend).generate_simplex(width, height, scale, seed, stats=stats)
+
+def generate_fractal_noise(width, height, scale, octaves=6, lacunarity=2.0, persistence=0.5, seed=0, cpu_count=3, stats=None, backend="process"):
+    """
+    Generate fractal (fBm) Perlin noise using the given parameters.
+
+    Parameters:
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (float): Scale factor of the coarsest octave.
+    - octaves (int): Number of octaves.
+    - lacunarity (float): Frequency factor between octaves.
+    - persistence (float): Amplitude factor between octaves.
+    - seed (int): Seed of the hashed lattices.
+    - cpu_count (int): Number of parallel processes to run.
+    - stats (GenerationStats): Optional collector of per-phase and per-worker timings.
+    - backend (str): "process" or "thread", see PerlinGenerator.
+
+    Returns:
+    - noise (n-dimensional array): Fractal noise array of shape (height, width) in [0, 1].
+    """
+    return get_generator(cpu_count, stats, backend).generate_fractal(width, height, scale, octaves, lacunarity, persistence, seed, stats=stats)
 
 if __name__ == '__main__':
     # Demo Usage
@@ -123,7 +856,6 @@ if __name__ == '__main__':
     scale = 30  # Scale looks like "zoom" on noise
 
     # Benchmark parallelization of noise gen
-    import time
     for cpu in range(1, 11):  # Pool count of 1 to 4 processes
         start = time.time()
         # Generate Perlin noise with cpu count pool
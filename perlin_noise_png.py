@@ -0,0 +1,70 @@
+# Minimal PNG encoder for noise maps, zlib and struct only
+# Noise tiles and maps are written without matplotlib or an imaging library, so headless
+# jobs and the tile server stay light to import.
+
+import zlib
+import struct
+import numpy as np
+
+_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# PNG color types by number of channels, grayscale, grayscale and alpha, RGB, RGBA
+_COLOR_TYPES = {1: 0, 2: 4, 3: 2, 4: 6}
+
+def _chunk(kind, data):
+    # Length, type, data and the CRC of type and data
+    return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+def to_uint8(noise):
+    """
+    Noise in [0, 1] as 8 bit pixels, values outside are clipped.
+
+    Parameters:
+    - noise (n-dimensional array): Floating point noise, or uint8 pixels returned as they are.
+
+    Returns:
+    - pixels (n-dimensional array): uint8 array of the same shape.
+    """
+    if noise.dtype == np.uint8:
+        return noise
+    pixels = np.clip(noise, 0, 1) * 255
+    pixels += 0.5
+    return pixels.astype(np.uint8)
+
+def encode_png(pixels, level=6):
+    """
+    Encode an image as PNG bytes.
+
+    Parameters:
+    - pixels (n-dimensional array): (height, width) grayscale or (height, width, channels) image,
+      uint8 or uint16, or floating point noise in [0, 1], stored as 8 bits.
+    - level (int): zlib compression level, 1 is fastest.
+
+    Returns:
+    - png (bytes): PNG file contents.
+    """
+    if not np.issubdtype(pixels.dtype, np.integer):
+        pixels = to_uint8(pixels)
+    if pixels.dtype not in (np.uint8, np.uint16):
+        raise ValueError(f"PNG pixels must be uint8, uint16 or floating point, not {pixels.dtype}")
+    height, width = pixels.shape[:2]
+    channels = 1 if pixels.ndim == 2 else pixels.shape[2]
+    # PNG samples are big endian, every row starts with filter type 0
+    samples = np.ascontiguousarray(pixels, dtype=pixels.dtype.newbyteorder(">")).reshape(height, -1).view(np.uint8)
+    rows = np.empty((height, samples.shape[1] + 1), dtype=np.uint8)
+    rows[:, 0] = 0
+    rows[:, 1:] = samples
+    header = struct.pack(">IIBBBBB", width, height, pixels.dtype.itemsize * 8, _COLOR_TYPES[channels], 0, 0, 0)
+    return (_SIGNATURE + _chunk(b"IHDR", header) + _chunk(b"IDAT", zlib.compress(rows.tobytes(), level))
+            + _chunk(b"IEND", b""))
+
+def write_png(path, pixels, level=6):
+    """
+    Write an image to a PNG file, see encode_png.
+
+    Parameters:
+    - path (str): Output file.
+    - pixels (n-dimensional array): Image or noise in [0, 1].
+    - level (int): zlib compression level.
+    """
+    with open(path, "wb") as file:
+        file.write(encode_png(pixels, level))
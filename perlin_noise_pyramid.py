@@ -0,0 +1,163 @@
+# Multi-resolution pyramid of a noise map, levels of detail evaluated straight from the lattice
+# Level l holds every 2**l-th pixel of the full map in both directions, computed with the
+# kernel's step argument rather than by downsampling a finer level, so a level costs only its
+# own pixels. Viewers draw the level that matches their canvas and compute finer windows of
+# the map only when zoomed in.
+
+import math
+import numpy as np
+from perlin_noise_vectorized import make_gradients, block_rows_for, compute_block
+
+# Coarsest level is about this many pixels per side
+RANGE_SIZE = 256
+# Extrema normalizing every level are sampled with about this many pixels per side
+RANGE_SAMPLES = 1024
+
+class NoisePyramid:
+    """
+    Lazily computed levels and windows of one noise map, every one normalized with the same
+    range so levels and windows line up in value as well as in position.
+
+    The range is the extrema of a sample of about RANGE_SAMPLES pixels per side, as the true
+    extrema are only known once all of level 0 is computed. Pixels past the sampled extrema are
+    clipped, so level 0 approximates the map of generate_perlin_noise: within 0.01 for scales
+    of 50 and more, about 0.04 at scale 10 where the sample misses more peaks.
+    """
+
+    def __init__(self, width, height, scale, seed=0, algorithm="perlin", dtype=np.float32, noise=None):
+        """
+        Parameters:
+        - width (int): Width of the full resolution map.
+        - height (int): Height of the full resolution map.
+        - scale (int): Scale factor for generating the noise.
+        - seed (int): Seed of the lattice.
+        - algorithm (str): "perlin", the make_gradients lattice of generate_perlin_noise, or "simplex".
+        - dtype (data-type): np.float32 or np.float64 for the computation and levels.
+        - noise (n-dimensional array): Optional full resolution map already generated, levels are
+          then strided views of it and nothing is computed.
+        """
+        if algorithm not in ("perlin", "simplex"):
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        self.width = width
+        self.height = height
+        self.scale = scale
+        self.seed = seed
+        self.algorithm = algorithm
+        self.dtype = dtype
+        self.noise = noise
+        self.gradients = make_gradients(width, height, scale, seed) if algorithm == "perlin" and noise is None else None
+        # Level 0 is the full map, the last level is about RANGE_SIZE pixels per side
+        self.levels = max(1, math.ceil(math.log2(max(width, height) / RANGE_SIZE)) + 1)
+        self._cache = {}
+        self._range = None
+
+    def level_for(self, map_pixels, canvas_pixels):
+        """
+        Coarsest level that still has a pixel for every canvas pixel.
+
+        Parameters:
+        - map_pixels (float): Map pixels shown across the canvas, the map size when not zoomed.
+        - canvas_pixels (float): Canvas pixels the map is drawn on.
+
+        Returns:
+        - level (int): Level number, 0 is full resolution.
+        """
+        if canvas_pixels <= 0 or map_pixels <= canvas_pixels:
+            return 0
+        return min(self.levels - 1, int(math.log2(map_pixels / canvas_pixels)))
+
+    def _raw(self, step, x_start, y_start, width, height):
+        # Raw noise of a map window, every step-th pixel
+        if self.algorithm == "simplex":
+            from simplex_noise import region
+            return region(self.seed, self.scale, x_start, y_start, width, height, self.dtype, normalize=False, step=step)
+        rows, columns = len(range(0, height, step)), len(range(0, width, step))
+        noise = np.empty((rows, columns), dtype=self.dtype)
+        block_rows = block_rows_for(columns)
+        for row_start in range(0, rows, block_rows):
+            row_stop = min(row_start + block_rows, rows)
+            compute_block(self.gradients, y_start + row_start * step, y_start + row_stop * step, columns, self.scale,
+                          noise[row_start:row_stop], x_start=x_start, step=step)
+        return noise
+
+    def value_range(self):
+        """
+        Raw (min, max) used to normalize every level and window, sampled, see NoisePyramid.
+
+        Returns:
+        - value_range (tuple): (min, max) of the raw noise of the sample.
+        """
+        if self._range is None:
+            step = 2 ** max(0, math.ceil(math.log2(max(self.width, self.height) / RANGE_SAMPLES)))
+            sample = self._raw(step, 0, 0, self.width, self.height)
+            self._range = float(np.min(sample)), float(np.max(sample))
+        return self._range
+
+    def _normalize(self, noise):
+        # Pixels between the samples can reach slightly past their extrema, those are clipped
+        low, high = self.value_range()
+        noise -= low
+        if high > low:
+            noise /= high - low
+        return np.clip(noise, 0, 1, out=noise)
+
+    def level(self, level):
+        """
+        Whole level of the map, computed on first use.
+
+        Parameters:
+        - level (int): Level number, 0 is full resolution.
+
+        Returns:
+        - noise (n-dimensional array): Read only level of shape (ceil(height / 2**level), ceil(width / 2**level)).
+        """
+        if level not in self._cache and self.noise is not None:
+            self._cache[level] = self.noise[::2 ** level, ::2 ** level]
+        if level not in self._cache:
+            noise = self._normalize(self._raw(2 ** level, 0, 0, self.width, self.height))
+            noise.setflags(write=False)
+            self._cache[level] = noise
+        return self._cache[level]
+
+    def window(self, level, x_start, y_start, x_stop, y_stop):
+        """
+        Part of a level covering a map rectangle, computed directly without the rest of the level.
+
+        Parameters:
+        - level (int): Level number, 0 is full resolution.
+        - x_start (float): Left map column of the rectangle.
+        - y_start (float): Top map row of the rectangle.
+        - x_stop (float): Right map column of the rectangle.
+        - y_stop (float): Bottom map row of the rectangle.
+
+        Returns:
+        - window (tuple): (noise, extent), the level pixels covering the rectangle, and their
+          (left, right, bottom, top) map extent for imshow.
+        """
+        step = 2 ** level
+        # Snap to the level grid and clamp to the map, so window pixels are level pixels
+        x_start = max(0, int(x_start) // step * step)
+        y_start = max(0, int(y_start) // step * step)
+        x_stop = min(self.width, math.ceil(x_stop))
+        y_stop = min(self.height, math.ceil(y_stop))
+        if level in self._cache or self.noise is not None:
+            noise = self.level(level)[y_start // step:math.ceil(y_stop / step), x_start // step:math.ceil(x_stop / step)]
+        else:
+            noise = self._normalize(self._raw(step, x_start, y_start, max(1, x_stop - x_start), max(1, y_stop - y_start)))
+        rows, columns = noise.shape
+        return noise, (x_start, x_start + columns * step, y_start + rows * step, y_start)
+
+if __name__ == '__main__':
+    # Demo Usage, a 500 pixel canvas showing a 8192 map, then zoomed into a corner
+    import time
+    pyramid = NoisePyramid(8192, 8192, 100)
+
+    start = time.time()
+    level = pyramid.level_for(8192, 500)
+    noise = pyramid.level(level)
+    print(f"Level {level} {noise.shape} took: {time.time() - start:.6f}Seconds")
+
+    start = time.time()
+    level = pyramid.level_for(1024, 500)
+    noise, extent = pyramid.window(level, 0, 0, 1024, 1024)
+    print(f"Zoomed window level {level} {noise.shape} took: {time.time() - start:.6f}Seconds")
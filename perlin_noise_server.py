@@ -0,0 +1,449 @@
+""" Local asyncio HTTP server of noise tiles, with a size bounded disk cache and a load test client
+
+Usage:
+    python perlin_noise_server.py serve --port 8000 --seed 0 --scale 100 --workers 4
+    python perlin_noise_server.py load --port 8000 --requests 2000 --concurrency 32
+
+Tiles are served at /z/x/y.png (8 bit grayscale) or /z/x/y.npy (float32). Zoom level z
+shows the map 2**z times larger, so the four tiles (2x, 2y), (2x + 1, 2y), ... of level z + 1
+cover tile (x, y) of level z. Tiles are rendered from the hashed lattice of perlin_noise_tiles
+or simplex_noise in a process pool, kept in an LRU disk cache bounded in bytes, and concurrent
+requests for the same tile share one rendering.
+"""
+import os
+import io
+import sys
+import time
+import random
+import asyncio
+import argparse
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Width and height of every tile
+TILE_SIZE = 256
+# Default disk cache bound, 256 MiB
+DEFAULT_CACHE_BYTES = 256 * 1024 * 1024
+# Largest zoom level served
+MAX_ZOOM = 24
+# Content type of every tile format
+CONTENT_TYPES = {"png": "image/png", "npy": "application/octet-stream"}
+
+def render_tile(algorithm, seed, scale, z, x, y, size, tile_format):
+    """
+    Render one tile to file contents, runs in a worker process.
+
+    Parameters:
+    - algorithm (str): "perlin" or "simplex".
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor at zoom level 0.
+    - z (int): Zoom level.
+    - x (int): Tile column.
+    - y (int): Tile row.
+    - size (int): Width and height of the tile.
+    - tile_format (str): "png" or "npy".
+
+    Returns:
+    - contents (bytes): PNG or .npy file contents.
+    """
+    # Imported here, so the server process itself never loads the kernels
+    if algorithm == "simplex":
+        from simplex_noise import tile
+    else:
+        from perlin_noise_tiles import tile
+    noise = tile(seed, scale * 2 ** z, x, y, size, np.float32)
+    if tile_format == "png":
+        from perlin_noise_png import encode_png
+        return encode_png(noise, level=1)
+    buffer = io.BytesIO()
+    np.save(buffer, noise)
+    return buffer.getvalue()
+
+class TileDiskCache:
+    """
+    LRU cache of tile files in a directory, evicting least recently used files once the total
+    size exceeds max_bytes. Existing files are picked up on start, oldest use first.
+
+    Thread safe, so the file writes of put can run in an executor while get runs on the loop.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Parameters:
+        - directory (str): Cache directory, created when missing.
+        - max_bytes (int): Size bound of the cached files.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+        # File name -> size, least recently used first, modification time records the last use
+        self._files = OrderedDict()
+        self._lock = threading.Lock()
+        entries = [entry for entry in os.scandir(directory) if entry.is_file() and not entry.name.endswith(".tmp")]
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            self._files[entry.name] = entry.stat().st_size
+            self.nbytes += entry.stat().st_size
+        self._evict()
+
+    def get(self, name):
+        """
+        Cached file contents, marked as most recently used.
+
+        Parameters:
+        - name (str): File name of the tile.
+
+        Returns:
+        - contents (bytes): File contents, or None on a miss.
+        """
+        with self._lock:
+            if name not in self._files:
+                self.misses += 1
+                return None
+        path = os.path.join(self.directory, name)
+        try:
+            with open(path, "rb") as file:
+                contents = file.read()
+            os.utime(path)
+        except OSError:
+            # Removed behind our back or evicted meanwhile, forget it
+            with self._lock:
+                if name in self._files:
+                    self.nbytes -= self._files.pop(name)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            if name in self._files:
+                self._files.move_to_end(name)
+        return contents
+
+    def put(self, name, contents):
+        """
+        Cache file contents, evicting least recently used files to stay within max_bytes.
+
+        Parameters:
+        - name (str): File name of the tile.
+        - contents (bytes): File contents.
+        """
+        if len(contents) > self.max_bytes:
+            return
+        # Written to a temporary file and renamed, so readers never see a partial tile, the
+        # temporary name is per thread as concurrent puts of a tile can happen
+        path = os.path.join(self.directory, name)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "wb") as file:
+            file.write(contents)
+        os.replace(temporary, path)
+        with self._lock:
+            if name in self._files:
+                self.nbytes -= self._files.pop(name)
+            self._files[name] = len(contents)
+            self.nbytes += len(contents)
+            self._evict()
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and self._files:
+            name, size = self._files.popitem(last=False)
+            self.nbytes -= size
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+
+class TileServer:
+    """
+    HTTP/1.1 tile server, connections are kept alive between requests.
+
+    Use inside a running event loop:
+        server = TileServer(cache_dir="tiles")
+        await server.start("127.0.0.1", 8000)
+        await server.serve_forever()
+    """
+
+    def __init__(self, seed=0, scale=100, algorithm="perlin", size=TILE_SIZE, workers=None,
+                 cache_dir="tile_cache", cache_bytes=DEFAULT_CACHE_BYTES):
+        """
+        Parameters:
+        - seed (int): Seed of the lattice.
+        - scale (float): Scale factor at zoom level 0.
+        - algorithm (str): "perlin" or "simplex".
+        - size (int): Width and height of every tile.
+        - workers (int): Rendering processes, defaults to every cpu.
+        - cache_dir (str): Directory of the disk cache.
+        - cache_bytes (int): Size bound of the disk cache.
+        """
+        self.seed = seed
+        self.scale = scale
+        self.algorithm = algorithm
+        self.size = size
+        self.cache = TileDiskCache(cache_dir, cache_bytes)
+        self.rendered = 0
+        self.coalesced = 0
+        # Workers start on demand, forked straight from this process they would inherit the sockets
+        # of open connections and keep them open after the server closes them
+        context = multiprocessing.get_context("forkserver") if "forkserver" in multiprocessing.get_all_start_methods() else None
+        self._pool = ProcessPoolExecutor(workers, mp_context=context)
+        # Tile name -> task rendering it, later requests for the same tile await the same task
+        self._rendering = {}
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=8000):
+        """
+        Start listening, port 0 picks a free port.
+
+        Returns:
+        - port (int): Port the server listens on.
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._pool.shutdown()
+
+    async def tile(self, z, x, y, tile_format):
+        """
+        Contents of a tile, from the disk cache or rendered once for every concurrent request.
+
+        Parameters:
+        - z (int): Zoom level.
+        - x (int): Tile column.
+        - y (int): Tile row.
+        - tile_format (str): "png" or "npy".
+
+        Returns:
+        - contents (bytes): Tile file contents.
+        """
+        name = f"{self.algorithm}_{self.seed}_{self.scale}_{self.size}_{z}_{x}_{y}.{tile_format}"
+        contents = self.cache.get(name)
+        if contents is not None:
+            return contents
+        task = self._rendering.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._render(name, z, x, y, tile_format))
+            self._rendering[name] = task
+        else:
+            self.coalesced += 1
+        # Shielded, so a client hanging up does not cancel the rendering other requests wait for
+        return await asyncio.shield(task)
+
+    async def _render(self, name, z, x, y, tile_format):
+        loop = asyncio.get_running_loop()
+        try:
+            contents = await loop.run_in_executor(self._pool, render_tile, self.algorithm, self.seed, self.scale,
+                                                  z, x, y, self.size, tile_format)
+            self.rendered += 1
+            # File writes off the event loop, in the default thread executor
+            await loop.run_in_executor(None, self.cache.put, name, contents)
+            return contents
+        finally:
+            self._rendering.pop(name, None)
+
+    def parse_path(self, path):
+        """
+        Tile coordinates of a request path.
+
+        Parameters:
+        - path (str): Request path, /z/x/y.png or /z/x/y.npy.
+
+        Returns:
+        - tile (tuple): (z, x, y, format), or None for a path that is not a tile.
+        """
+        parts = path.split("?")[0].strip("/").split("/")
+        if len(parts) != 3 or "." not in parts[2]:
+            return None
+        last, tile_format = parts[2].rsplit(".", 1)
+        try:
+            z, x, y = int(parts[0]), int(parts[1]), int(last)
+        except ValueError:
+            return None
+        if tile_format not in CONTENT_TYPES or not 0 <= z <= MAX_ZOOM:
+            return None
+        return z, x, y, tile_format
+
+    async def _read_request(self, reader):
+        # (method, path, version, headers) of the next request, None once the client is done,
+        # ValueError for a malformed request and lines past the reader limit
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        parts = request_line.decode("latin-1").split()
+        if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+            raise ValueError("malformed request line")
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, separator, value = line.decode("latin-1").partition(":")
+            if not separator:
+                raise ValueError("malformed header line")
+            headers[key.strip().lower()] = value.strip()
+        return (*parts, headers)
+
+    async def _respond(self, writer, version, status, content_type, body, keep_alive):
+        writer.write(f"{version} {status}\r\nContent-Type: {content_type}\r\n"
+                     f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode()
+                     + body)
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except (asyncio.LimitOverrunError, ValueError) as error:
+                    # Nothing more can be read reliably from the connection, answer and close it
+                    await self._respond(writer, "HTTP/1.1", "400 Bad Request", "text/plain", f"{error}\n".encode(), False)
+                    break
+                if request is None:
+                    break
+                method, path, version, headers = request
+                tile = self.parse_path(path) if method == "GET" else None
+                if tile is None:
+                    status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+                else:
+                    try:
+                        body = await self.tile(*tile)
+                        status, content_type = "200 OK", CONTENT_TYPES[tile[3]]
+                    except Exception as error:
+                        status, content_type, body = "500 Internal Server Error", "text/plain", f"{error}\n".encode()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                await self._respond(writer, version, status, content_type, body, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def fetch(reader, writer, path):
+    """
+    Send one GET over a kept alive connection and read the response.
+
+    Parameters:
+    - reader (asyncio.StreamReader): Connection reader.
+    - writer (asyncio.StreamWriter): Connection writer.
+    - path (str): Request path.
+
+    Returns:
+    - response (tuple): (status code, body bytes).
+    """
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        if key.strip().lower() == "content-length":
+            length = int(value)
+    return status, await reader.readexactly(length)
+
+async def load_test(host, port, requests=1000, concurrency=16, zoom=4, tile_format="png", seed=0):
+    """
+    Request random tiles of one zoom level from many connections at once.
+
+    Parameters:
+    - host (str): Server host.
+    - port (int): Server port.
+    - requests (int): Total number of requests.
+    - concurrency (int): Number of connections, each sending its requests one after another.
+    - zoom (int): Zoom level, tiles are drawn from its 2**zoom x 2**zoom tiles.
+    - tile_format (str): "png" or "npy".
+    - seed (int): Seed of the tile choice.
+
+    Returns:
+    - stats (dict): Requests per second, latency percentiles in seconds and error count.
+    """
+    choice = random.Random(seed)
+    paths = [f"/{zoom}/{choice.randrange(2 ** zoom)}/{choice.randrange(2 ** zoom)}.{tile_format}" for _ in range(requests)]
+    latencies = []
+    errors = 0
+
+    async def connection(paths):
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for path in paths:
+                start = time.perf_counter()
+                status, _ = await fetch(reader, writer, path)
+                latencies.append(time.perf_counter() - start)
+                errors += status != 200
+        finally:
+            writer.close()
+            await writer.wait_closed()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(connection(paths[index::concurrency]) for index in range(concurrency)))
+    total = time.perf_counter() - start
+    return {
+        "requests_per_second": requests / total,
+        "p50": float(np.percentile(latencies, 50)),
+        "p90": float(np.percentile(latencies, 90)),
+        "p99": float(np.percentile(latencies, 99)),
+        "errors": errors,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="Serve tiles")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--seed", type=int, default=0)
+    serve_parser.add_argument("--scale", type=float, default=100)
+    serve_parser.add_argument("--algorithm", choices=["perlin", "simplex"], default="perlin")
+    serve_parser.add_argument("--size", type=int, default=TILE_SIZE)
+    serve_parser.add_argument("--workers", type=int)
+    serve_parser.add_argument("--cache-dir", default="tile_cache")
+    serve_parser.add_argument("--cache-bytes", type=int, default=DEFAULT_CACHE_BYTES)
+
+    load_parser = commands.add_parser("load", help="Load test a running server")
+    load_parser.add_argument("--host", default="127.0.0.1")
+    load_parser.add_argument("--port", type=int, default=8000)
+    load_parser.add_argument("--requests", type=int, default=1000)
+    load_parser.add_argument("--concurrency", type=int, default=16)
+    load_parser.add_argument("--zoom", type=int, default=4)
+    load_parser.add_argument("--format", choices=list(CONTENT_TYPES), default="png")
+
+    args = parser.parse_args(argv)
+    if args.command == "load":
+        stats = asyncio.run(load_test(args.host, args.port, args.requests, args.concurrency, args.zoom, args.format))
+        print(f"{stats['requests_per_second']:.1f} requests/s  p50 {stats['p50'] * 1000:.1f} ms"
+              f"  p90 {stats['p90'] * 1000:.1f} ms  p99 {stats['p99'] * 1000:.1f} ms  {stats['errors']} errors")
+        return 1 if stats["errors"] else 0
+
+    async def serve():
+        server = TileServer(args.seed, args.scale, args.algorithm, args.size, args.workers, args.cache_dir, args.cache_bytes)
+        port = await server.start(args.host, args.port)
+        print(f"Serving tiles on http://{args.host}:{port}/z/x/y.png")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.close()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
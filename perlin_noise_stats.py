@@ -0,0 +1,158 @@
+# Per-phase timing of noise generation
+# A GenerationStats collects wall time, call counts and bytes moved for every phase of a
+# generation, for the generating process and for each worker process, so it shows where
+# time goes as the cpu count grows.
+
+import os
+import time
+from contextlib import contextmanager
+
+class PhaseStats:
+    """
+    Accumulated time, calls and bytes of one phase.
+    """
+
+    def __init__(self):
+        self.seconds = 0.0
+        self.calls = 0
+        self.bytes = 0
+
+    def add(self, seconds, calls=1, nbytes=0):
+        self.seconds += seconds
+        self.calls += calls
+        self.bytes += nbytes
+
+    def as_dict(self):
+        return {"seconds": self.seconds, "calls": self.calls, "bytes": self.bytes}
+
+class GenerationStats:
+    """
+    Collector of per-phase statistics, pass one as stats= to a generate function.
+
+    Phases of the generating process are in phases, phases measured inside worker processes
+    are in workers, by worker pid or thread ident, and summed over every worker in worker_totals().
+    """
+
+    def __init__(self):
+        self.phases = {}
+        self.workers = {}
+
+    def add(self, name, seconds, calls=1, nbytes=0, worker=None):
+        """
+        Record time spent in a phase.
+
+        Parameters:
+        - name (str): Phase name.
+        - seconds (float): Time spent.
+        - calls (int): Number of calls the time covers.
+        - nbytes (int): Bytes moved or written by the phase.
+        - worker (int): Pid or thread ident of the worker it was measured in, None for this process.
+        """
+        phases = self.phases if worker is None else self.workers.setdefault(worker, {})
+        phases.setdefault(name, PhaseStats()).add(seconds, calls, nbytes)
+
+    @contextmanager
+    def phase(self, name, nbytes=0):
+        """
+        Time the body of a with statement as one call of a phase.
+
+        Parameters:
+        - name (str): Phase name.
+        - nbytes (int): Bytes moved or written by the phase.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, 1, nbytes)
+
+    def merge_worker(self, timings):
+        """
+        Record the timings a worker task sent back, see WorkerTimer.timings.
+
+        Parameters:
+        - timings (tuple): (worker, list of (phase, seconds, nbytes)).
+        """
+        pid, phases = timings
+        for name, seconds, nbytes in phases:
+            self.add(name, seconds, 1, nbytes, worker=pid)
+
+    def worker_totals(self):
+        """
+        Worker phases summed over every worker.
+
+        Returns:
+        - phases (dict): PhaseStats by phase name.
+        """
+        totals = {}
+        for phases in self.workers.values():
+            for name, phase in phases.items():
+                total = totals.setdefault(name, PhaseStats())
+                total.add(phase.seconds, phase.calls, phase.bytes)
+        return totals
+
+    def as_dict(self):
+        """
+        Statistics as plain data, for JSON.
+
+        Returns:
+        - stats (dict): {"phases": {...}, "workers": {pid: {...}}}.
+        """
+        return {"phases": {name: phase.as_dict() for name, phase in self.phases.items()},
+                "workers": {str(pid): {name: phase.as_dict() for name, phase in phases.items()}
+                            for pid, phases in self.workers.items()}}
+
+    def summary(self):
+        """
+        Readable breakdown of every phase, one per line.
+
+        Returns:
+        - summary (str): Phase, seconds, calls and bytes of this process, then worker totals.
+        """
+        lines = []
+        for title, phases in (("", self.phases), (f"{len(self.workers)} workers: ", self.worker_totals())):
+            for name, phase in phases.items():
+                line = f"{title}{name}: {phase.seconds:.4f}s x{phase.calls}"
+                if phase.bytes >= 2**20:
+                    line += f" {phase.bytes / 2**20:.1f} MiB"
+                elif phase.bytes:
+                    line += f" {phase.bytes / 2**10:.1f} KiB"
+                lines.append(line)
+        return "\n".join(lines)
+
+class NullStats(GenerationStats):
+    """
+    Collector recording nothing, stands in when no stats are passed so generators can skip
+    measurements that cost time of their own, like pickling the task arguments again.
+    """
+
+    def add(self, name, seconds, calls=1, nbytes=0, worker=None):
+        pass
+
+class WorkerTimer:
+    """
+    Collects phase timings inside a worker task, to be sent back with the task result.
+    """
+
+    def __init__(self, worker=None):
+        """
+        Parameters:
+        - worker (int): Worker id reported with the timings, defaults to the pid, threads pass their ident.
+        """
+        self.worker = os.getpid() if worker is None else worker
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name, nbytes=0):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start, nbytes))
+
+    def timings(self):
+        """
+        Returns:
+        - timings (tuple): (worker, list of (phase, seconds, nbytes)), for GenerationStats.merge_worker.
+        """
+        return self.worker, self.phases
@@ -0,0 +1,258 @@
+# Out-of-core Perlin noise, streams bands of rows to .npy files on disk
+# Memory stays bounded by the band size, so maps larger than RAM can be generated.
+# For maps that fit in RAM, PerlinGenerator.generate(out=np.lib.format.open_memmap(...))
+# from perlin_noise_parallel writes to disk in parallel instead.
+
+import os
+import json
+import numpy as np
+from perlin_noise_vectorized import PERLIN_BOUND, block_rows_for, compute_block, is_quantized, quantize
+
+# Rows per band when none is given, about 16 MiB of float32 per band for a 30k wide map
+BAND_PIXELS = 1 << 22
+
+class LatticeStream:
+    """
+    Gradient lattice rows drawn on demand, identical to make_gradients for the same seed.
+
+    RandomState draws the lattice in row major order, so keeping the state and drawing
+    the next rows when needed gives the same gradients without holding the whole lattice.
+    """
+
+    def __init__(self, width, height, scale, seed=0):
+        """
+        Parameters:
+        - width (int): Width of the noise array.
+        - height (int): Height of the noise array.
+        - scale (int): Scale factor for generating the noise.
+        - seed (int): Seed of the gradient lattice.
+        """
+        self.rows = height // scale + 2
+        self.columns = width // scale + 2
+        self._random = np.random.RandomState(seed)
+        self._window = np.empty((0, self.columns, 2))
+        self._origin = 0
+
+    def window(self, first_row, stop_row):
+        """
+        Lattice rows first_row to stop_row, rows must be requested in increasing order.
+
+        Parameters:
+        - first_row (int): First lattice row needed.
+        - stop_row (int): Lattice row after the last one needed.
+
+        Returns:
+        - gradients (n-dimensional array): Lattice window, its row 0 is lattice row first_row.
+        """
+        drawn = self._origin + len(self._window)
+        if stop_row > drawn:
+            new_rows = self._random.randn(stop_row - drawn, self.columns, 2)
+            self._window = np.concatenate((self._window, new_rows))
+        # Forget rows no band will need again
+        self._window = self._window[first_row - self._origin:]
+        self._origin = first_row
+        return self._window[:stop_row - first_row]
+
+def max_gradient_norm(width, height, scale, seed=0):
+    """
+    Largest gradient length of a lattice, drawn one lattice row at a time.
+
+    Parameters:
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (int): Scale factor for generating the noise.
+    - seed (int): Seed of the gradient lattice.
+
+    Returns:
+    - norm (float): Largest gradient vector length.
+    """
+    lattice = LatticeStream(width, height, scale, seed)
+    norm = 0.0
+    for row in range(lattice.rows):
+        norm = max(norm, float(np.max(np.hypot(*lattice.window(row, row + 1)[0].T))))
+    return norm
+
+class RowWriter:
+    """
+    Writes and reads back bands of rows of a (height, width) array stored in one .npy
+    file, or split into chunk files of chunk_rows rows each.
+    """
+
+    def __init__(self, path, width, height, dtype, chunk_rows=None):
+        """
+        Parameters:
+        - path (str): .npy file, or directory of chunk files when chunk_rows is given.
+        - width (int): Width of the array.
+        - height (int): Height of the array.
+        - dtype (data-type): Data type of the array.
+        - chunk_rows (int): Rows per chunk file, None for a single file.
+        """
+        self.width = width
+        self.dtype = np.dtype(dtype)
+        # (row_start, row_stop, file, data offset) of every file
+        self.segments = []
+        if chunk_rows is None:
+            self.segments.append((0, height, path, self._create(path, height)))
+        else:
+            os.makedirs(path, exist_ok=True)
+            files = []
+            for index, row_start in enumerate(range(0, height, chunk_rows)):
+                row_stop = min(row_start + chunk_rows, height)
+                name = f"chunk_{index:05d}.npy"
+                files.append(name)
+                self.segments.append((row_start, row_stop, os.path.join(path, name), self._create(os.path.join(path, name), row_stop - row_start)))
+            # Manifest so readers can map chunks lazily, see open_chunks
+            with open(os.path.join(path, "index.json"), "w") as manifest:
+                json.dump({"width": width, "height": height, "dtype": self.dtype.str,
+                           "chunk_rows": chunk_rows, "files": files}, manifest)
+
+    def _create(self, path, rows):
+        # open_memmap writes the .npy header and sizes the file, data is then written with plain file io
+        array = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype, shape=(rows, self.width))
+        offset = array.offset
+        del array
+        return offset
+
+    def _parts(self, y_start, y_stop):
+        for row_start, row_stop, path, offset in self.segments:
+            start, stop = max(y_start, row_start), min(y_stop, row_stop)
+            if start < stop:
+                yield start, stop, path, offset + (start - row_start) * self.width * self.dtype.itemsize
+
+    def write(self, y_start, rows):
+        """
+        Write rows starting at row y_start.
+
+        Parameters:
+        - y_start (int): First row to write.
+        - rows (n-dimensional array): Rows of shape (n, width).
+        """
+        rows = np.ascontiguousarray(rows, dtype=self.dtype)
+        for start, stop, path, offset in self._parts(y_start, y_start + len(rows)):
+            with open(path, "r+b") as file:
+                file.seek(offset)
+                rows[start - y_start:stop - y_start].tofile(file)
+
+    def read(self, y_start, y_stop):
+        """
+        Read rows y_start to y_stop back from disk.
+
+        Parameters:
+        - y_start (int): First row to read.
+        - y_stop (int): Row after the last row to read.
+
+        Returns:
+        - rows (n-dimensional array): Rows of shape (y_stop - y_start, width).
+        """
+        rows = np.empty((y_stop - y_start, self.width), dtype=self.dtype)
+        for start, stop, path, offset in self._parts(y_start, y_stop):
+            with open(path, "rb") as file:
+                file.seek(offset)
+                rows[start - y_start:stop - y_start] = np.fromfile(file, dtype=self.dtype, count=(stop - start) * self.width).reshape(-1, self.width)
+        return rows
+
+def open_chunks(path):
+    """
+    Lazily memory map every chunk of a chunked output directory.
+
+    Parameters:
+    - path (str): Directory written by generate_to_file with chunk_rows.
+
+    Returns:
+    - chunks (list): Read only np.memmap of every chunk, top to bottom.
+    """
+    with open(os.path.join(path, "index.json")) as manifest:
+        files = json.load(manifest)["files"]
+    return [np.load(os.path.join(path, name), mmap_mode="r") for name in files]
+
+def generate_to_file(path, width, height, scale, seed=0, dtype=np.float32, normalization="two-pass", band_rows=None, chunk_rows=None,
+                     value_range=None):
+    """
+    Generate Perlin noise to disk one band of rows at a time.
+
+    Parameters:
+    - path (str): Output .npy file, or output directory when chunk_rows is given.
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (int): Scale factor for generating the noise.
+    - seed (int): Seed of the gradient lattice, same lattice as make_gradients.
+    - dtype (data-type): np.float32 or np.float64 for the computation and the file, or uint8, uint16
+      or float16 for a quantized file, computed in float32 and written in a single pass, which
+      needs the "analytic" normalization or a value_range.
+    - normalization (str): "two-pass" rescales the written file to exactly [0, 1] in a second pass,
+      "analytic" maps the theoretical range of the lattice to [0, 1] in a single pass,
+      None keeps the raw noise values.
+    - band_rows (int): Rows computed and held in memory at once, defaults to about BAND_PIXELS pixels.
+    - chunk_rows (int): Rows per chunk file, None writes a single .npy file.
+    - value_range (tuple): Stated (low, high) raw range mapped to [0, 1] in a single pass,
+      instead of normalization.
+
+    Returns:
+    - extrema (tuple): (min, max) of the raw noise values.
+    """
+    if normalization not in ("two-pass", "analytic", None):
+        raise ValueError(f"Unknown normalization: {normalization}")
+    quantized = is_quantized(dtype)
+    if quantized and value_range is None and normalization != "analytic":
+        raise ValueError("Quantized output needs the analytic normalization or a value_range")
+    if band_rows is None:
+        band_rows = block_rows_for(width, BAND_PIXELS)
+    writer = RowWriter(path, width, height, dtype, chunk_rows)
+
+    # Analytic range, the largest gradient scales the unit gradient bound
+    if value_range is None and normalization == "analytic":
+        bound = PERLIN_BOUND * max_gradient_norm(width, height, scale, seed)
+        value_range = (-bound, bound)
+
+    lattice = LatticeStream(width, height, scale, seed)
+    band = np.empty((band_rows, width), dtype=np.float32 if quantized else dtype)
+    if quantized:
+        quantized_band = np.empty((band_rows, width), dtype=dtype)
+    block_rows = block_rows_for(width)
+    array_min, array_max = np.inf, -np.inf
+    for y_start in range(0, height, band_rows):
+        y_stop = min(y_start + band_rows, height)
+        rows = band[:y_stop - y_start]
+
+        # Only the lattice rows this band touches are held in memory
+        first_cell_y = y_start // scale
+        gradients = lattice.window(first_cell_y, (y_stop - 1) // scale + 2)
+        for block_start in range(y_start, y_stop, block_rows):
+            block_stop = min(block_start + block_rows, y_stop)
+            compute_block(gradients, block_start, block_stop, width, scale, rows[block_start - y_start:block_stop - y_start], (first_cell_y, 0))
+
+        array_min = min(array_min, float(np.min(rows)))
+        array_max = max(array_max, float(np.max(rows)))
+        if quantized:
+            # Written once, in the final type
+            quantize(rows, quantized_band[:len(rows)], value_range)
+            rows = quantized_band[:len(rows)]
+        elif value_range is not None:
+            low, high = value_range
+            rows -= low
+            rows /= high - low
+        writer.write(y_start, rows)
+
+    # Second pass over the file, one band in memory at a time
+    if normalization == "two-pass" and value_range is None:
+        divide_by = array_max - array_min
+        for y_start in range(0, height, band_rows):
+            rows = writer.read(y_start, min(y_start + band_rows, height))
+            rows -= array_min
+            if divide_by:
+                rows /= divide_by
+            writer.write(y_start, rows)
+
+    return array_min, array_max
+
+if __name__ == '__main__':
+    # Demo Usage
+    import sys
+    import time
+    path = sys.argv[1] if len(sys.argv) > 1 else "perlin_noise.npy"
+    width = height = 8192
+    scale = 100
+
+    start = time.time()
+    generate_to_file(path, width, height, scale)
+    print(f"Wrote {width} x {height} to {path} in {time.time() - start:.3f}Seconds")
@@ -0,0 +1,177 @@
+# Seamless Perlin noise tiles from a hashed gradient lattice
+# Every lattice gradient is a hash of (seed, row, column), so any tile of an unbounded map
+# can be computed on its own, with no shared state, and matches its neighbours exactly.
+
+import math
+import numpy as np
+from perlin_noise_vectorized import PERLIN_BOUND, block_rows_for, compute_block, interpolate_corners
+
+# splitmix64 constants
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+def _mix(value):
+    # splitmix64 finalizer, uint64 arithmetic wraps around
+    value = (value ^ (value >> np.uint64(30))) * _MIX_1
+    value = (value ^ (value >> np.uint64(27))) * _MIX_2
+    return value ^ (value >> np.uint64(31))
+
+def hash_coordinates(seed, *coordinates):
+    """
+    Hash integer lattice coordinates with a seed.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - coordinates (n-dimensional arrays): Integer coordinate arrays, broadcast together.
+
+    Returns:
+    - hashes (n-dimensional array): uint64 hash of every coordinate.
+    """
+    # Scalar uint64 math warns on the wrap around the hash relies on
+    with np.errstate(over="ignore"):
+        value = _mix(np.asarray(seed, dtype=np.int64).view(np.uint64) + _GOLDEN)
+        for coordinate in coordinates:
+            value = _mix(value ^ (np.asarray(coordinate, dtype=np.int64).view(np.uint64) + _GOLDEN))
+    return value
+
+def hashed_gradients(seed, first_row, first_column, rows, columns):
+    """
+    Window of the unit gradient lattice of a seed.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - first_row (int): Lattice row of the first window row, may be negative.
+    - first_column (int): Lattice column of the first window column, may be negative.
+    - rows (int): Number of lattice rows.
+    - columns (int): Number of lattice columns.
+
+    Returns:
+    - gradients (n-dimensional array): Unit gradients of shape (rows, columns, 2).
+    """
+    cell_y = np.arange(first_row, first_row + rows)[:, None]
+    cell_x = np.arange(first_column, first_column + columns)
+    return np.stack(gradients_at(seed, cell_y, cell_x), axis=-1)
+
+def gradients_at(seed, cell_y, cell_x):
+    """
+    Unit gradients of a seed at arbitrary lattice points.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - cell_y (n-dimensional array): Integer lattice rows.
+    - cell_x (n-dimensional array): Integer lattice columns, broadcast with cell_y.
+
+    Returns:
+    - gradients (tuple): (x components, y components) arrays.
+    """
+    # Top 53 bits of the hash as an angle in [0, 2 pi)
+    angle = (hash_coordinates(seed, cell_y, cell_x) >> np.uint64(11)) * (2 * math.pi / 2 ** 53)
+    return np.cos(angle), np.sin(angle)
+
+def region(seed, scale, x_start, y_start, width, height, dtype=np.float64, normalize=True, out=None):
+    """
+    Perlin noise of any rectangle of the unbounded map of a seed.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor for generating the noise.
+    - x_start (int): Map column of the left edge, may be negative.
+    - y_start (int): Map row of the top edge, may be negative.
+    - width (int): Width of the rectangle.
+    - height (int): Height of the rectangle.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Map the theoretical range [-sqrt(2)/2, sqrt(2)/2] to [0, 1], the same
+      for every region so tiles stay seamless, otherwise return raw noise values.
+    - out (n-dimensional array): Optional (height, width) destination, its dtype overrides dtype.
+
+    Returns:
+    - noise (n-dimensional array): Perlin noise array of shape (height, width), out when given.
+    """
+    # Lattice window covering the rectangle, plus the far corners of the last cells
+    first_row, first_column = int(y_start // scale), int(x_start // scale)
+    gradients = hashed_gradients(seed, first_row, first_column,
+                                 int((y_start + height - 1) // scale) + 2 - first_row,
+                                 int((x_start + width - 1) // scale) + 2 - first_column)
+
+    noise = np.empty((height, width), dtype=dtype) if out is None else out
+    block_rows = block_rows_for(width)
+    for block_start in range(0, height, block_rows):
+        block_stop = min(block_start + block_rows, height)
+        compute_block(gradients, y_start + block_start, y_start + block_stop, width, scale,
+                      noise[block_start:block_stop], (first_row, first_column), x_start)
+
+    if normalize:
+        noise += PERLIN_BOUND
+        noise /= 2 * PERLIN_BOUND
+    return noise
+
+def sample(seed, scale, x, y, dtype=np.float64, normalize=True):
+    """
+    Perlin noise of the unbounded map of a seed at arbitrary points.
+
+    Only the four lattice corners of every point are hashed, so the cost scales with the
+    number of points rather than the map area. Integer points match region and tile exactly.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor for generating the noise.
+    - x (n-dimensional array): Map x coordinates, may be fractional or negative.
+    - y (n-dimensional array): Map y coordinates, broadcast with x.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Map the theoretical range to [0, 1], see region.
+
+    Returns:
+    - noise (n-dimensional array): Noise value of every point, shape of x and y broadcast.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+
+    # Compute the grid cell indices and fractional offsets of every point
+    cell_x = (x // scale).astype(np.int64)
+    cell_y = (y // scale).astype(np.int64)
+    cell_offset_x = (x / scale - cell_x).astype(dtype, copy=False)
+    cell_offset_y = (y / scale - cell_y).astype(dtype, copy=False)
+
+    # Gradients of the four cell corners of every point
+    grad_tl = gradients_at(seed, cell_y, cell_x)
+    grad_tr = gradients_at(seed, cell_y, cell_x + 1)
+    grad_bl = gradients_at(seed, cell_y + 1, cell_x)
+    grad_br = gradients_at(seed, cell_y + 1, cell_x + 1)
+    grad_tl, grad_tr, grad_bl, grad_br = [[component.astype(dtype, copy=False) for component in grad]
+                                          for grad in (grad_tl, grad_tr, grad_bl, grad_br)]
+
+    noise = np.asarray(interpolate_corners(grad_tl, grad_tr, grad_bl, grad_br, cell_offset_x, cell_offset_y))
+    if normalize:
+        noise = (noise + PERLIN_BOUND) / (2 * PERLIN_BOUND)
+    return noise.astype(dtype, copy=False)
+
+def tile(seed, scale, tx, ty, size, dtype=np.float64, normalize=True):
+    """
+    Square tile of the unbounded map of a seed, exactly the pixels the whole map has there.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (int): Scale factor for generating the noise.
+    - tx (int): Tile column, may be negative.
+    - ty (int): Tile row, may be negative.
+    - size (int): Width and height of the tile.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Map the theoretical range to [0, 1], see region.
+
+    Returns:
+    - noise (n-dimensional array): Perlin noise array of shape (size, size).
+    """
+    return region(seed, scale, tx * size, ty * size, size, size, dtype, normalize)
+
+if __name__ == '__main__':
+    # Demo Usage, stitch 3 x 3 tiles and compare with the same region computed at once
+    seed = 0
+    scale = 30
+    size = 256
+    stitched = np.block([[tile(seed, scale, tx, ty, size) for tx in range(-1, 2)] for ty in range(-1, 2)])
+    whole = region(seed, scale, -size, -size, 3 * size, 3 * size)
+    print(f"Largest difference between stitched tiles and whole region: {np.max(np.abs(stitched - whole))}")
+
+    from perlin_noise_parallel import plot_noise
+    plot_noise(stitched, "Stitched Perlin noise tiles", cmap_given="twilight")
@@ -0,0 +1,336 @@
+# Whole-grid vectorized version of the VitoshAcademy Perlin noise
+# Source: https://github.com/Vitosh/Python_personal/blob/master/JupyterNotebook/Perlin-Noise/Perlin-Noise.ipynb
+# Same lattice and math as perlin_noise.py and perlin_noise_parallel.py, but every
+# pixel of a block of rows is evaluated at once with broadcast index and weight arrays.
+
+import math
+import functools
+import numpy as np
+
+# Largest |value| of the noise for a lattice of unit gradients, sqrt(2) / 2 in 2D
+PERLIN_BOUND = math.sqrt(0.5)
+# Number of pixels evaluated per block, keeps the block temporaries cache sized
+BLOCK_PIXELS = 1 << 15
+# Number of per-axis tables kept by axis_table
+AXIS_TABLE_CACHE = 32
+# Output types quantized straight from the kernel, the math runs in float32 block scratch
+QUANTIZED_DTYPES = (np.uint8, np.uint16, np.float16)
+
+def smoothstep(t):
+    return t * t * (3 - 2 * t)
+
+def lerp(a, b, t):
+    return a + t * (b - a)
+
+def make_gradients(width, height, scale, seed=0):
+    """
+    Generate the random gradient lattice for a noise map.
+
+    Uses a local RandomState, so the lattice is identical to calling
+    np.random.seed(seed) followed by np.random.randn, without touching global state.
+
+    Parameters:
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (int): Scale factor for generating the noise.
+    - seed (int): Seed of the gradient lattice.
+
+    Returns:
+    - gradients (n-dimensional array): Gradients of shape (height//scale + 2, width//scale + 2, 2).
+    """
+    return np.random.RandomState(seed).randn(height // scale + 2, width // scale + 2, 2)
+
+def block_rows_for(width, block_pixels=BLOCK_PIXELS):
+    """
+    Number of rows to evaluate per block for a given width.
+
+    Parameters:
+    - width (int): Width of the noise array.
+    - block_pixels (int): Target number of pixels per block.
+
+    Returns:
+    - rows (int): Rows per block, at least 1.
+    """
+    return max(1, block_pixels // max(1, width))
+
+def _axis_table(start, length, scale, dtype, step=1):
+    # Cell index, offset in the cell and smoothstep weight of every coordinate along one axis
+    coordinate = start + np.arange(length) * step
+    cell = (coordinate // scale).astype(np.intp, copy=False)
+    offset = (coordinate / scale - cell).astype(dtype, copy=False)
+    return cell, offset, smoothstep(offset)
+
+@functools.lru_cache(maxsize=AXIS_TABLE_CACHE)
+def axis_table(start, length, scale, dtype=np.float64, step=1):
+    """
+    Cached per-axis index and weight table, shared by every row or column along that axis.
+
+    At most AXIS_TABLE_CACHE tables are kept, the least recently used is evicted first.
+
+    Parameters:
+    - start (int): First coordinate along the axis.
+    - length (int): Number of coordinates.
+    - scale (float): Scale factor for generating the noise.
+    - dtype (data-type): Data type of the offsets and weights.
+    - step (int): Distance between consecutive coordinates.
+
+    Returns:
+    - table (tuple): Read only (cell index, cell offset, smoothstep weight) arrays of the coordinates.
+    """
+    table = _axis_table(start, length, scale, np.dtype(dtype), step)
+    for array in table:
+        array.setflags(write=False)
+    return table
+
+def slice_table(table, start, stop):
+    """
+    Part of an axis table.
+
+    Parameters:
+    - table (tuple): Table from axis_table.
+    - start (int): First entry, relative to the table start.
+    - stop (int): Entry after the last one.
+
+    Returns:
+    - table (tuple): Table of the entries start to stop.
+    """
+    return tuple(array[start:stop] for array in table)
+
+def compute_block(gradients, y_start, y_stop, width, scale, out, lattice_origin=(0, 0), x_start=0, y_table=None, step=1):
+    """
+    Compute rows y_start to y_stop of Perlin noise at once.
+
+    The interpolation is separable: along a lattice row the x terms of the top and bottom
+    corner dot products are evaluated once per cell row, so every pixel only blends two
+    precomputed rows with its y offset and weight in a few fused multiply-adds.
+
+    Leading axes of the lattice are batch axes: a stack of lattices of shape (n, rows, columns, 2)
+    computes the same rows of n maps into out of shape (n, rows, width), sharing every table.
+
+    Parameters:
+    - gradients (n-dimensional array): Gradient lattice from make_gradients, or a stack of lattices.
+    - y_start (int): First row to be computed.
+    - y_stop (int): Row after the last row to be computed.
+    - width (int): Number of columns to be computed.
+    - scale (float): Scale factor for generating the noise.
+    - out (n-dimensional array): Destination of shape (ceil((y_stop - y_start) / step), width), after the
+      batch axes of gradients, its dtype is used for the math.
+    - lattice_origin (tuple): (row, column) lattice cell of gradients[0, 0], for windows of a larger lattice.
+    - x_start (int): First column to be computed, for blocks that do not start at the left edge.
+    - y_table (tuple): Optional axis_table entries of the rows to be computed, computed when not given.
+    - step (int): Only every step-th row and column is computed, for previews and coarse levels.
+    """
+    dtype = out.dtype
+
+    # Per-axis cell indices, offsets and weights, the x table is shared by every block
+    cell_x, cell_offset_x, weight_x = axis_table(x_start, width, scale, dtype, step)
+    if y_table is None:
+        y_table = _axis_table(y_start, len(range(y_start, y_stop, step)), scale, dtype, step)
+    cell_y, cell_offset_y, weight_y = (array[:, None] for array in y_table)
+
+    # Expand the lattice rows touched by this block to pixel columns once, as separate
+    # contiguous x and y component planes of shape (2, batch..., lattice rows, width)
+    first_cell_y = int(cell_y[0, 0])
+    origin_y, origin_x = lattice_origin
+    lattice = gradients[..., first_cell_y - origin_y:int(cell_y[-1, 0]) + 2 - origin_y, :, :]
+    lattice = np.moveaxis(lattice.astype(dtype, copy=False), -1, 0)
+    left = lattice[..., cell_x - origin_x]
+    right = lattice[..., cell_x + 1 - origin_x]
+
+    # Horizontal interpolation of every lattice row, split into the part independent of the
+    # y offset and the factor of the y offset: row_value = constant + offset_y * slope
+    constant = left[0] * cell_offset_x
+    constant += weight_x * (right[0] * (cell_offset_x - 1) - constant)
+    slope = left[1] + weight_x * (right[1] - left[1])
+
+    # Top and bottom corner rows of every pixel row, then the vertical blend
+    row = (cell_y - first_cell_y)[:, 0]
+    top = constant[..., row, :]
+    top += cell_offset_y * slope[..., row, :]
+    bottom = constant[..., row + 1, :]
+    bottom += (cell_offset_y - 1) * slope[..., row + 1, :]
+    bottom -= top
+    bottom *= weight_y
+    np.add(top, bottom, out=out)
+
+def interpolate_corners(grad_tl, grad_tr, grad_bl, grad_br, cell_offset_x, cell_offset_y):
+    """
+    Perlin noise value from the gradients at the four cell corners and the offsets in the cell.
+
+    Parameters:
+    - grad_tl, grad_tr, grad_bl, grad_br: Corner gradients, index 0 is the x and index 1 the y component,
+      every component broadcastable with the offsets.
+    - cell_offset_x (n-dimensional array): Position within the cell along x, in [0, 1).
+    - cell_offset_y (n-dimensional array): Position within the cell along y, in [0, 1).
+
+    Returns:
+    - noise (n-dimensional array): Interpolated noise values.
+    """
+    # Dot products of the gradients and the offsets to each corner
+    dot_tl = cell_offset_x * grad_tl[0] + cell_offset_y * grad_tl[1]
+    dot_tr = (cell_offset_x - 1) * grad_tr[0] + cell_offset_y * grad_tr[1]
+    dot_bl = cell_offset_x * grad_bl[0] + (cell_offset_y - 1) * grad_bl[1]
+    dot_br = (cell_offset_x - 1) * grad_br[0] + (cell_offset_y - 1) * grad_br[1]
+
+    # Smooth interpolation weights
+    weight_x = smoothstep(cell_offset_x)
+    weight_y = smoothstep(cell_offset_y)
+
+    # Interpolate horizontally, then vertically
+    interp_top = lerp(dot_tl, dot_tr, weight_x)
+    interp_bottom = lerp(dot_bl, dot_br, weight_x)
+    return lerp(interp_top, interp_bottom, weight_y)
+
+def is_quantized(dtype):
+    """
+    Whether an output type is one of QUANTIZED_DTYPES.
+
+    Parameters:
+    - dtype (data-type): Output data type.
+
+    Returns:
+    - quantized (bool): True for uint8, uint16 and float16.
+    """
+    return np.dtype(dtype) in [np.dtype(quantized) for quantized in QUANTIZED_DTYPES]
+
+def analytic_range(gradients):
+    """
+    Theoretical range of the noise of a lattice, known before any pixel is computed.
+
+    The unit gradient bound scales with the longest gradient of the lattice, so no noise
+    value of the lattice falls outside the range, although the real extrema are narrower.
+
+    Parameters:
+    - gradients (n-dimensional array): Gradient lattice.
+
+    Returns:
+    - value_range (tuple): (low, high) bound of the raw noise values.
+    """
+    bound = PERLIN_BOUND * float(np.sqrt(np.max(np.sum(np.square(gradients), axis=-1))))
+    return -bound, bound
+
+def quantize(raw, out, value_range):
+    """
+    Map raw noise values from a fixed range to [0, 1] in the output type, in one pass.
+
+    Integer types span their whole range, 0 to 255 for uint8, and are rounded to nearest.
+
+    Parameters:
+    - raw (n-dimensional array): Raw floating point noise, used as scratch and modified in place.
+    - out (n-dimensional array): Destination of the same shape, of a QUANTIZED_DTYPES or float type.
+    - value_range (tuple): (low, high) raw values mapped to 0 and the top of the output range.
+    """
+    low, high = value_range
+    top = np.iinfo(out.dtype).max if np.issubdtype(out.dtype, np.integer) else 1.0
+    raw -= low
+    raw *= top / (high - low) if high > low else 0
+    if np.issubdtype(out.dtype, np.integer):
+        raw += 0.5
+    # Clip guards values of a stated range narrower than the noise
+    np.clip(raw, 0, top, out=raw)
+    np.copyto(out, raw, casting="unsafe")
+
+def compute_quantized_block(gradients, y_start, y_stop, width, scale, out, value_range, scratch=None, **kwargs):
+    """
+    Compute rows of Perlin noise straight into a quantized output, see compute_block.
+
+    The float32 values only live in a block sized scratch buffer, so the full resolution
+    output is written once, in its final type, with no normalization pass.
+
+    Parameters:
+    - gradients (n-dimensional array): Gradient lattice, see compute_block.
+    - y_start (int): First row to be computed.
+    - y_stop (int): Row after the last row to be computed.
+    - width (int): Number of columns to be computed.
+    - scale (float): Scale factor for generating the noise.
+    - out (n-dimensional array): Destination rows, see compute_block, of a QUANTIZED_DTYPES type.
+    - value_range (tuple): (low, high) raw range mapped to the output range, see analytic_range.
+    - scratch (n-dimensional array): Optional float32 buffer of at least out.size elements, reused between blocks.
+    - kwargs: Other compute_block arguments, lattice_origin, x_start, y_table and step.
+    """
+    if scratch is None or scratch.size < out.size:
+        scratch = np.empty(out.size, dtype=np.float32)
+    raw = scratch.reshape(-1)[:out.size].reshape(out.shape)
+    compute_block(gradients, y_start, y_stop, width, scale, raw, **kwargs)
+    quantize(raw, out, value_range)
+
+def normalize(noise):
+    """
+    Normalize noise to the range [0, 1] in place.
+
+    Parameters:
+    - noise (n-dimensional array): Floating point noise array, modified in place.
+
+    Returns:
+    - noise (n-dimensional array): The same array.
+    """
+    array_min = np.min(noise)
+    divide_by = np.max(noise) - array_min
+    noise -= array_min
+    if divide_by:
+        noise /= divide_by
+    return noise
+
+def generate_perlin_noise(width, height, scale, dtype=np.float64, seed=0, gradients=None, block_rows=None, step=1, value_range=None):
+    """
+    Generate Perlin noise using the given parameters, evaluating blocks of rows at once.
+
+    Parameters:
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (int): Scale factor for generating the noise.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result, or uint8, uint16 or
+      float16 for a single pass quantized result, normalized with value_range instead of the extrema.
+    - seed (int): Seed of the gradient lattice, 0 matches perlin_noise_parallel.
+    - gradients (n-dimensional array): Optional gradient lattice, overrides seed.
+    - block_rows (int): Rows evaluated per block, defaults to about BLOCK_PIXELS pixels.
+    - step (int): Only every step-th row and column of the map is evaluated, a preview of
+      the same map at 1 / step of the resolution.
+    - value_range (tuple): (low, high) raw range of a quantized result, defaults to analytic_range.
+
+    Returns:
+    - noise (n-dimensional array): Perlin noise array of shape (ceil(height / step), ceil(width / step)).
+    """
+    if gradients is None:
+        gradients = make_gradients(width, height, scale, seed)
+    rows, columns = len(range(0, height, step)), len(range(0, width, step))
+    if block_rows is None:
+        block_rows = block_rows_for(columns)
+
+    noise = np.empty((rows, columns), dtype=dtype)
+    if is_quantized(dtype):
+        # Quantized in the same pass, the range is known up front
+        if value_range is None:
+            value_range = analytic_range(gradients)
+        scratch = np.empty(block_rows * columns, dtype=np.float32)
+        y_table = axis_table(0, rows, scale, np.float32, step)
+        for row_start in range(0, rows, block_rows):
+            row_stop = min(row_start + block_rows, rows)
+            compute_quantized_block(gradients, row_start * step, row_stop * step, columns, scale, noise[row_start:row_stop],
+                                    value_range, scratch, y_table=slice_table(y_table, row_start, row_stop), step=step)
+        return noise
+
+    y_table = axis_table(0, rows, scale, dtype, step)
+    for row_start in range(0, rows, block_rows):
+        row_stop = min(row_start + block_rows, rows)
+        compute_block(gradients, row_start * step, row_stop * step, columns, scale, noise[row_start:row_stop],
+                      y_table=slice_table(y_table, row_start, row_stop), step=step)
+
+    # Normalize the noise to the range [0, 1]
+    return normalize(noise)
+
+if __name__ == '__main__':
+    # Demo Usage
+    import time
+    import sys
+    width = height = 2048
+    scale = 30
+
+    for dtype in (np.float64, np.float32):
+        start = time.time()
+        noise = generate_perlin_noise(width, height, scale, dtype)
+        print(f"{np.dtype(dtype).name} {width} x {height} took: {time.time() - start:.6f}Seconds")
+
+    if "--plot" in sys.argv:
+        from perlin_noise_parallel import plot_noise
+        plot_noise(noise, "Perlin noise example", cmap_given="twilight")
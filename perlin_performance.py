@@ -1,58 +1,390 @@
-""" Creates a Performance.csv of statistics for perlin_noise.py and perlin_noise_parallel.py """
-import timeit
-import csv
-
-# Noise Scale
-scale = 10
-# Times to repeat the same test for more accurate average
-repeat = 5
-# Max processes to use for parallel algorithm
-max_cpu = 8
-
-
-# Write to csv
-with open("Performance.csv", 'w') as csvfile:
-    # Test column is name of algorithm and noise dimensions
-    fieldnames = ["Test"]
-    # Add a column for each cpu used in test
-    fieldnames.extend([f"CPU_{n}" for n in range(1, max_cpu+1)])
-    
-    # Writer converts dicts to spreasheet rows
-    writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-    writer.writeheader()
-
-    # Dimensions are 2**x, ex: 2**9=512, dimensions will be 512x512 for all tests
-    for x in range(6, 14):
-        # Set width and height to same dimmension
-        width = 2**x
-        height=width
-
-        # Perform sequential test of original algorithm
-        time_sequential = timeit.timeit(f"perlin_noise.generate_perlin_noise({width}, {height}, {scale})", setup="import perlin_noise", number=repeat)
-        # total time spent must be divided by repeat amount to get average time spent
-        time = time_sequential/repeat
-        # Set test name (VitoshAcademy is name of py code creator)
-        row = {"Test": f"Vitosh {width} x {height}"}
-        # Set all cpus to the same time found (this code is non parallel)
-        for cpu in range(1, max_cpu+1):
-            row[f"CPU_{cpu}"]= f"{time}"
-        # Write the row
-        writer.writerow(row)
-        # Notify user of row written
-        print(row)
-
-        # New row of parallel algorithm
-        row = {"Test": f"Parallel {width} x {height}"}
-        # Run test for each cpu from 1 to max
-        for cpu in range(1, max_cpu+1):
-            # Run noise generation of parallel algorithm
-            time_paral  = timeit.timeit(f"perlin_noise_parallel.generate_perlin_noise({width}, {height}, {scale}, {cpu})", setup="import perlin_noise_parallel", number=repeat)
-            # Get average from repeated test
-            time = time_paral / repeat
-            # Update dictionary for this test
-            row[f"CPU_{cpu}"] = f"{time}"
-
-        # Write parallel test to csv
-        writer.writerow(row)
-        # Notify user test is done
-        print(row)
+""" Benchmark suite for the Perlin noise engines, results saved as JSON and compared against a baseline
+
+Usage:
+    python perlin_performance.py run --sizes 64 512 2048 --workers 1 2 4 --output results.json
+    python perlin_performance.py run --baseline baseline.json
+    python perlin_performance.py compare baseline.json results.json --threshold 0.1
+
+Every engine is set up (pools started, imports done) and warmed up before it is timed, so
+only noise generation is measured. Peak memory is measured in a separate untimed call with
+tracemalloc, which only sees allocations of this process. Engines running in worker processes
+add the peak resident set size of every worker (VmHWM of /proc/<pid>/status, reset before the
+call) and the shared output and lattice, an upper bound as shared pages a worker touched are
+also part of its resident set. Without /proc their peak is reported as n/a. The output size
+of every engine is recorded alongside.
+Import times of the library, CLI and GUI modules are measured in fresh interpreters, as
+short lived jobs pay them on every start.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from collections import namedtuple
+import numpy as np
+
+# Engine name -> how to set it up and call it, the dtype names it supports (None when it has no
+# dtype and always runs float64), engines using stats accept a stats= keyword.
+# setup returns (run, teardown, worker_pids), worker_pids is None for engines allocating in this
+# process, or returns the pids of the worker processes the engine runs in
+Engine = namedtuple("Engine", ["setup", "uses_workers", "dtypes", "uses_stats"], defaults=[False])
+
+# Data types of the engines, quantized ones only where the engine writes them in a single pass
+FLOAT_DTYPES = ("float64", "float32")
+ALL_DTYPES = FLOAT_DTYPES + ("uint8", "uint16", "float16")
+
+def _setup_sequential(workers, dtype):
+    import perlin_noise
+    return (lambda width, height, scale: perlin_noise.generate_perlin_noise(width, height, scale)), None, None
+
+def _setup_vectorized(workers, dtype):
+    import perlin_noise_vectorized
+    return (lambda width, height, scale: perlin_noise_vectorized.generate_perlin_noise(width, height, scale, dtype)), None, None
+
+def _setup_parallel(workers, dtype):
+    from perlin_noise_parallel import PerlinGenerator
+    generator = PerlinGenerator(workers)
+    return (lambda width, height, scale, stats=None: generator.generate(width, height, scale, dtype=dtype, stats=stats)), \
+        generator.close, generator.worker_pids
+
+def _setup_threaded(workers, dtype):
+    from perlin_noise_parallel import PerlinGenerator
+    generator = PerlinGenerator(workers, backend="thread")
+    return (lambda width, height, scale, stats=None: generator.generate(width, height, scale, dtype=dtype, stats=stats)), \
+        generator.close, None
+
+def _setup_simplex(workers, dtype):
+    import simplex_noise
+    return (lambda width, height, scale: simplex_noise.generate_simplex_noise(width, height, scale, dtype=dtype)), None, None
+
+def _setup_simplex_parallel(workers, dtype):
+    from perlin_noise_parallel import PerlinGenerator
+    generator = PerlinGenerator(workers)
+    return (lambda width, height, scale, stats=None: generator.generate_simplex(width, height, scale, dtype=dtype, stats=stats)), \
+        generator.close, generator.worker_pids
+
+# Engines by name, new engines only need an entry here
+ENGINES = {
+    "sequential": Engine(_setup_sequential, uses_workers=False, dtypes=None),
+    "vectorized": Engine(_setup_vectorized, uses_workers=False, dtypes=ALL_DTYPES),
+    "parallel": Engine(_setup_parallel, uses_workers=True, dtypes=ALL_DTYPES, uses_stats=True),
+    "threaded": Engine(_setup_threaded, uses_workers=True, dtypes=ALL_DTYPES, uses_stats=True),
+    "simplex": Engine(_setup_simplex, uses_workers=False, dtypes=FLOAT_DTYPES),
+    "simplex-parallel": Engine(_setup_simplex_parallel, uses_workers=True, dtypes=FLOAT_DTYPES, uses_stats=True),
+}
+
+# Modules whose import time is tracked, from the core kernel up to the GUI
+IMPORT_MODULES = ["perlin_noise_vectorized", "perlin_noise_parallel", "perlin_cli", "perlin_noise", "ParaPerlinDemo"]
+
+def measure_imports(modules, repeat):
+    """
+    Time importing each module in a fresh interpreter, nothing imported or cached beforehand
+    apart from the interpreter itself.
+
+    Parameters:
+    - modules (list): Module names next to this file.
+    - repeat (int): Number of interpreters started per module.
+
+    Returns:
+    - imports (dict): Module name -> times, their median and minimum in seconds, or the error
+      of a module that can not be imported here, ex: ParaPerlinDemo without tkinter.
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    imports = {}
+    for module in modules:
+        code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+        times = []
+        for _ in range(repeat):
+            output = subprocess.run([sys.executable, "-c", code], cwd=directory, capture_output=True, text=True)
+            if output.returncode != 0:
+                lines = output.stderr.strip().splitlines()
+                imports[module] = {"error": lines[-1] if lines else f"exit status {output.returncode}"}
+                break
+            times.append(float(output.stdout.split()[-1]))
+        else:
+            imports[module] = {"times": times, "median": float(np.median(times)), "min": min(times)}
+        if "error" in imports[module]:
+            print(f"{'import':>12} {module:<24} failed: {imports[module]['error']}")
+        else:
+            print(f"{'import':>12} {module:<24} median {imports[module]['median']:.6f}s")
+    return imports
+
+def reset_peak_rss(pids):
+    """
+    Reset the peak resident set size of processes to their current one, where Linux allows it.
+
+    Parameters:
+    - pids (list): Process ids.
+    """
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/clear_refs", "w") as clear_refs:
+                clear_refs.write("5")
+        except OSError:
+            pass
+
+def peak_rss(pids):
+    """
+    Sum of the peak resident set size of processes.
+
+    Parameters:
+    - pids (list): Process ids.
+
+    Returns:
+    - peak (int): Bytes, None when /proc/<pid>/status can not be read, ex: not on Linux.
+    """
+    total = 0
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/status") as status:
+                lines = [line for line in status if line.startswith("VmHWM:")]
+        except OSError:
+            return None
+        if not lines:
+            return None
+        total += int(lines[0].split()[1]) * 1024
+    return total
+
+def measure(run, width, height, scale, repeat, warmup, uses_stats=False, worker_pids=None):
+    """
+    Time repeated calls of an engine and measure its peak memory.
+
+    Parameters:
+    - run (function): Engine call taking (width, height, scale).
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (int): Scale factor for generating the noise.
+    - repeat (int): Number of timed calls.
+    - warmup (int): Number of untimed calls before timing.
+    - uses_stats (bool): Also record the per-phase breakdown of one untimed call.
+    - worker_pids (function): Pids of the engine's worker processes, None when it allocates in this
+      process. Their peak resident set and the shared output and lattice are then added to the peak.
+
+    Returns:
+    - stats (dict): Timings, their median, percentiles and throughput, peak memory, output size and phases.
+    """
+    for _ in range(warmup):
+        run(width, height, scale)
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run(width, height, scale)
+        times.append(time.perf_counter() - start)
+
+    # Separate call for memory, tracemalloc slows allocation heavy code down
+    if worker_pids is None:
+        tracemalloc.start()
+        output_bytes = run(width, height, scale).nbytes
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    else:
+        from perlin_noise_stats import GenerationStats
+        pids = worker_pids()
+        reset_peak_rss(pids)
+        memory_stats = GenerationStats()
+        tracemalloc.start()
+        output_bytes = run(width, height, scale, stats=memory_stats).nbytes
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        workers_peak = peak_rss(pids)
+        lattice = memory_stats.phases.get("lattice copy")
+        shared_bytes = output_bytes + (lattice.bytes if lattice is not None else 0)
+        peak_memory = None if workers_peak is None else peak_memory + workers_peak + shared_bytes
+
+    # Separate call for the per-phase breakdown
+    phases = None
+    if uses_stats:
+        from perlin_noise_stats import GenerationStats
+        generation_stats = GenerationStats()
+        run(width, height, scale, stats=generation_stats)
+        phases = generation_stats.as_dict()
+
+    median = float(np.median(times))
+    return {
+        "times": times,
+        "median": median,
+        "p10": float(np.percentile(times, 10)),
+        "p90": float(np.percentile(times, 90)),
+        "min": min(times),
+        "megapixels_per_second": width * height / median / 1e6,
+        "peak_memory_bytes": peak_memory,
+        "output_bytes": output_bytes,
+        "phases": phases,
+    }
+
+def result_key(result):
+    """
+    Identity of a benchmark case, used to match results against a baseline.
+
+    Parameters:
+    - result (dict): One entry of the results list.
+
+    Returns:
+    - key (tuple): (engine, size, scale, workers, dtype).
+    """
+    return (result["engine"], result["size"], result["scale"], result["workers"], result["dtype"])
+
+def run_benchmarks(engines, sizes, scales, workers, dtypes, repeat, warmup, max_sequential_size):
+    """
+    Run every combination of the given parameters that applies to each engine.
+
+    Parameters:
+    - engines (list): Engine names from ENGINES.
+    - sizes (list): Width and height of the square noise maps.
+    - scales (list): Scale factors.
+    - workers (list): Worker counts, for engines that use workers.
+    - dtypes (list): Data type names, each engine runs those it supports.
+    - repeat (int): Number of timed calls per case.
+    - warmup (int): Number of untimed calls per case.
+    - max_sequential_size (int): Largest size run with the sequential engine.
+
+    Returns:
+    - results (list): One dict per case.
+    """
+    results = []
+    for name in engines:
+        engine = ENGINES[name]
+        engine_dtypes = ["float64"] if engine.dtypes is None else [dtype for dtype in dtypes if dtype in engine.dtypes]
+        skipped = [] if engine.dtypes is None else [dtype for dtype in dtypes if dtype not in engine.dtypes]
+        if skipped:
+            print(f"{name:>12} skipped, unsupported dtypes: {' '.join(skipped)}")
+        for worker_count in (workers if engine.uses_workers else [1]):
+            for dtype in engine_dtypes:
+                # Setup (imports, process pools) is timed once, apart from generation
+                start = time.perf_counter()
+                run, teardown, worker_pids = engine.setup(worker_count, np.dtype(dtype))
+                setup_seconds = time.perf_counter() - start
+                try:
+                    for size in sizes:
+                        if name == "sequential" and size > max_sequential_size:
+                            continue
+                        for scale in scales:
+                            result = {"engine": name, "size": size, "scale": scale, "workers": worker_count,
+                                      "dtype": dtype, "setup_seconds": setup_seconds}
+                            result.update(measure(run, size, size, scale, repeat, warmup, engine.uses_stats, worker_pids))
+                            results.append(result)
+                            peak = result["peak_memory_bytes"]
+                            peak = "     n/a" if peak is None else f"{peak / 2**20:8.1f}"
+                            print(f"{name:>12} {size:>5} x {size:<5} scale {scale:<4} workers {worker_count:<3} {dtype:<8}"
+                                  f" median {result['median']:.6f}s  {result['megapixels_per_second']:8.2f} MP/s"
+                                  f"  peak {peak} MiB  output {result['output_bytes'] / 2**20:8.1f} MiB")
+                finally:
+                    if teardown is not None:
+                        teardown()
+    return results
+
+def environment():
+    """
+    Description of the machine the benchmarks ran on.
+
+    Returns:
+    - environment (dict): Python, NumPy, platform and cpu count.
+    """
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def compare(baseline, results, threshold):
+    """
+    Compare results against a baseline by median time, of generation and of imports.
+
+    Parameters:
+    - baseline (dict): Saved benchmark JSON to compare against.
+    - results (dict): New benchmark JSON.
+    - threshold (float): Relative slowdown of the median that counts as a regression, 0.1 is 10%.
+
+    Returns:
+    - regressions (list): (key, baseline median, new median) of every regressed case.
+    """
+    baseline_medians = {result_key(result): result["median"] for result in baseline["results"]}
+    regressions = []
+    for result in results["results"]:
+        key = result_key(result)
+        if key not in baseline_medians:
+            continue
+        old, new = baseline_medians[key], result["median"]
+        change = new / old - 1
+        flag = "REGRESSION" if change > threshold else ""
+        if flag:
+            regressions.append((key, old, new))
+        engine, size, scale, workers, dtype = key
+        print(f"{engine:>12} {size:>5} scale {scale:<4} workers {workers:<3} {dtype:<8}"
+              f" {old:.6f}s -> {new:.6f}s {change:+8.1%} {flag}")
+
+    # Import times, when both runs measured them without errors
+    for module, result in results.get("imports", {}).items():
+        if "median" not in result or "median" not in baseline.get("imports", {}).get(module, {}):
+            continue
+        old, new = baseline["imports"][module]["median"], result["median"]
+        change = new / old - 1
+        flag = "REGRESSION" if change > threshold else ""
+        if flag:
+            regressions.append((("import", module), old, new))
+        print(f"{'import':>12} {module:<24} {old:.6f}s -> {new:.6f}s {change:+8.1%} {flag}")
+    return regressions
+
+def save_results(path, results):
+    with open(path, "w") as file:
+        json.dump(results, file, indent=2)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--engines", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    # Dimensions are 2**x, ex: 2**9=512, from 64 to 8192 by default
+    run_parser.add_argument("--sizes", nargs="+", type=int, default=[2**x for x in range(6, 14)])
+    run_parser.add_argument("--scales", nargs="+", type=int, default=[10])
+    run_parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4, 8])
+    run_parser.add_argument("--dtypes", nargs="+", default=list(FLOAT_DTYPES), choices=ALL_DTYPES)
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--warmup", type=int, default=1)
+    run_parser.add_argument("--max-sequential-size", type=int, default=256,
+                            help="Largest size run with the pixel by pixel sequential engine")
+    run_parser.add_argument("--imports", nargs="*", default=IMPORT_MODULES,
+                            help="Modules to time importing in a fresh interpreter, none to skip")
+    run_parser.add_argument("--import-repeat", type=int, default=5)
+    run_parser.add_argument("--output", default="Performance.json")
+    run_parser.add_argument("--baseline", help="Compare against this saved JSON after running")
+    run_parser.add_argument("--threshold", type=float, default=0.1)
+
+    compare_parser = commands.add_parser("compare", help="Compare two saved result files")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("results")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        results = {"environment": environment(),
+                   "results": run_benchmarks(args.engines, args.sizes, args.scales, args.workers, args.dtypes,
+                                             args.repeat, args.warmup, args.max_sequential_size)}
+        # Saved before timing imports too, so the benchmarks are kept whatever happens to those
+        save_results(args.output, results)
+        results["imports"] = measure_imports(args.imports, args.import_repeat)
+        save_results(args.output, results)
+        print(f"Saved {args.output}")
+        if args.baseline is None:
+            return 0
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    else:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        with open(args.results) as file:
+            results = json.load(file)
+
+    regressions = compare(baseline, results, args.threshold)
+    print(f"{len(regressions)} regression(s) over {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,264 @@
+# Simplex noise on the hashed gradient lattice of perlin_noise_tiles, in 2, 3 and 4 dimensions
+# Space is split into simplices instead of cubes, so every sample sums n + 1 corners instead
+# of the 2**n corners of Perlin noise, with no interpolation between them. Seeds, tiles and
+# regions work like perlin_noise_tiles: any region of the unbounded map of a seed is computed
+# on its own and matches its neighbours exactly, and normalization maps the theoretical range
+# to [0, 1]. PerlinGenerator.generate_simplex runs it in parallel.
+#
+# Throughput of point samples against the Perlin kernels, float64, 1 cpu, 1M points, in
+# megapixels per second, python simplex_noise.py reproduces it:
+#   2D  simplex ~1.8  Perlin (perlin_noise_tiles.sample)  ~1.8
+#   3D  simplex ~1.1  Perlin (perlin_noise_3d.sample)     ~0.8
+#   4D  simplex ~0.9  Perlin (perlin_sample)              ~0.5
+# Simplex work grows with n + 1 corners and Perlin work with 2**n, so simplex is even in 2D
+# and pulls ahead from 3D, 1.7x in 4D. Whole 2D maps are still fastest with the separable Perlin
+# kernel, see perlin_noise_vectorized, which shares work between pixels of a lattice row.
+
+import math
+import numpy as np
+from perlin_noise_vectorized import BLOCK_PIXELS, smoothstep, lerp
+from perlin_noise_tiles import hash_coordinates, gradients_at as tiles_gradients_at
+from perlin_noise_3d import gradients_3d_at
+
+# Squared radius of the corner contributions, 0.5 keeps the noise continuous in every dimension
+RADIUS_SQUARED = 0.5
+# Largest |value| of the noise for unit gradients, by dimension: the largest sum over the
+# corners of (r - |d|**2)**4 * |d|, gradients aligned with every offset, found numerically
+SIMPLEX_BOUNDS = {2: 0.010081, 3: 0.009290, 4: 0.009211}
+
+def gradients_at(seed, *cells):
+    """
+    Unit gradients of a seed at arbitrary lattice points of any dimension.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - cells (n-dimensional arrays): Integer lattice coordinates, one array per dimension, broadcast together.
+
+    Returns:
+    - gradients (list): One component array per dimension.
+    """
+    # Hashed last axis first, row major like the Perlin lattices, so 2D and 3D gradients are
+    # the same as perlin_noise_tiles and perlin_noise_3d
+    if len(cells) == 2:
+        return list(tiles_gradients_at(seed, cells[1], cells[0]))
+    if len(cells) == 3:
+        return list(gradients_3d_at(seed, cells[2], cells[1], cells[0]))
+    # 16 bits of the hash per component, then scaled to unit length
+    hashes = hash_coordinates(seed, *reversed(cells))
+    components = [((hashes >> np.uint64(16 * axis)) & np.uint64(0xFFFF)) * (2 / 0xFFFF) - 1 for axis in range(len(cells))]
+    length = np.sqrt(sum(component * component for component in components))
+    length = np.maximum(length, 1e-12)
+    return [component / length for component in components]
+
+def simplex(seed, coordinates, dtype=np.float64):
+    """
+    Raw simplex noise at points given in lattice units.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - coordinates (n-dimensional array): Points of shape (dimensions, count), 2 to 4 dimensions.
+    - dtype (data-type): np.float64 or np.float32 for the offsets and result.
+
+    Returns:
+    - noise (n-dimensional array): Raw noise of every point, shape (count,), in [-bound, bound].
+    """
+    # Corner sums accumulate in dtype, quantized types of perlin_noise_vectorized are not supported
+    if np.dtype(dtype) not in (np.float32, np.float64):
+        raise ValueError(f"Simplex noise is computed in float32 or float64, not {np.dtype(dtype).name}")
+    dimensions, count = coordinates.shape
+    skew = (math.sqrt(dimensions + 1) - 1) / dimensions
+    unskew = (1 - 1 / math.sqrt(dimensions + 1)) / dimensions
+
+    # Skewed cell of every point and the offset from its first corner, in float64 so large
+    # coordinates keep their precision, the offsets are then small
+    cell = np.floor(coordinates + coordinates.sum(axis=0) * skew)
+    offset = (coordinates - (cell - cell.sum(axis=0) * unskew)).astype(dtype, copy=False)
+    cell = cell.astype(np.int64)
+
+    # The simplex of a point steps one axis at a time, largest offset first
+    order = np.argsort(-offset, axis=0)
+    points = np.arange(count)
+    corner = np.zeros((dimensions, count), dtype=np.int64)
+    noise = np.zeros(count, dtype=dtype)
+    for vertex in range(dimensions + 1):
+        if vertex:
+            corner[order[vertex - 1], points] += 1
+        distance = offset - corner + vertex * unskew
+        falloff = RADIUS_SQUARED - np.einsum("ij,ij->j", distance, distance)
+        np.maximum(falloff, 0, out=falloff)
+        falloff *= falloff
+        falloff *= falloff
+        gradient = gradients_at(seed, *(cell + corner))
+        falloff *= sum(component * axis_distance for component, axis_distance in zip(gradient, distance))
+        noise += falloff
+    return noise
+
+def sample(seed, scale, *coordinates, dtype=np.float64, normalize=True):
+    """
+    Simplex noise of the unbounded map of a seed at arbitrary points.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor for every axis.
+    - coordinates (n-dimensional arrays): Map coordinates, x first, 2 to 4 arrays broadcast together.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Map the theoretical range, see SIMPLEX_BOUNDS, to [0, 1].
+
+    Returns:
+    - noise (n-dimensional array): Noise value of every point, shape of the coordinates broadcast.
+    """
+    coordinates = np.broadcast_arrays(*(np.asarray(coordinate, dtype=np.float64) for coordinate in coordinates))
+    shape = coordinates[0].shape
+    points = np.stack([coordinate.reshape(-1) for coordinate in coordinates]) / scale
+    noise = simplex(seed, points, dtype)
+    if normalize:
+        bound = SIMPLEX_BOUNDS[len(coordinates)]
+        noise += bound
+        noise /= 2 * bound
+    return noise.reshape(shape)
+
+def region(seed, scale, x_start, y_start, width, height, dtype=np.float64, normalize=True, out=None, higher=(), step=1):
+    """
+    Simplex noise of any rectangle of the unbounded map of a seed, like perlin_noise_tiles.region.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor for every axis.
+    - x_start (int): Map column of the left edge, may be negative.
+    - y_start (int): Map row of the top edge, may be negative.
+    - width (int): Width of the rectangle.
+    - height (int): Height of the rectangle.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Map the theoretical range to [0, 1], the same for every region so tiles stay seamless.
+    - out (n-dimensional array): Optional destination of the result shape, its dtype overrides dtype.
+    - higher (tuple): Map coordinates of the third and fourth axes, for 2D slices of 3D or 4D noise.
+    - step (int): Only every step-th row and column is computed, for previews.
+
+    Returns:
+    - noise (n-dimensional array): Noise array of shape (ceil(height / step), ceil(width / step)), out when given.
+    """
+    rows, columns = len(range(0, height, step)), len(range(0, width, step))
+    noise = np.empty((rows, columns), dtype=dtype) if out is None else out
+    x = (x_start + np.arange(columns) * step) / scale
+    higher = [np.full(1, coordinate / scale) for coordinate in higher]
+
+    # Blocks of whole rows keep the per-corner temporaries cache sized
+    block_rows = max(1, BLOCK_PIXELS // max(1, columns))
+    for block_start in range(0, rows, block_rows):
+        block_stop = min(block_start + block_rows, rows)
+        y = (y_start + np.arange(block_start, block_stop) * step) / scale
+        points = np.stack([axis.reshape(-1) for axis in np.broadcast_arrays(x[None, :], y[:, None], *higher)])
+        noise[block_start:block_stop] = simplex(seed, points, noise.dtype).reshape(block_stop - block_start, columns)
+
+    if normalize:
+        bound = SIMPLEX_BOUNDS[2 + len(higher)]
+        noise += bound
+        noise /= 2 * bound
+    return noise
+
+def tile(seed, scale, tx, ty, size, dtype=np.float64, normalize=True):
+    """
+    Square tile of the unbounded simplex map of a seed, like perlin_noise_tiles.tile.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor for every axis.
+    - tx (int): Tile column, may be negative.
+    - ty (int): Tile row, may be negative.
+    - size (int): Width and height of the tile.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - normalize (bool): Map the theoretical range to [0, 1].
+
+    Returns:
+    - noise (n-dimensional array): Simplex noise array of shape (size, size).
+    """
+    return region(seed, scale, tx * size, ty * size, size, size, dtype, normalize)
+
+def generate_simplex_noise(width, height, scale, seed=0, dtype=np.float64, step=1):
+    """
+    Generate simplex noise normalized to exactly [0, 1], like the Perlin generate_perlin_noise functions.
+
+    Parameters:
+    - width (int): Width of the noise array.
+    - height (int): Height of the noise array.
+    - scale (float): Scale factor for generating the noise.
+    - seed (int): Seed of the lattice.
+    - dtype (data-type): np.float64 or np.float32 for the computation and result.
+    - step (int): Only every step-th row and column is computed, for previews.
+
+    Returns:
+    - noise (n-dimensional array): Simplex noise array of shape (ceil(height / step), ceil(width / step)).
+    """
+    from perlin_noise_vectorized import normalize
+    return normalize(region(seed, scale, 0, 0, width, height, dtype, normalize=False, step=step))
+
+def frames(seed, scale, width, height, t_start=0.0, t_step=1.0, count=None, dtype=np.float64, step=1):
+    """
+    Iterate over consecutive frames of animated noise, 2D slices of 3D simplex noise along time,
+    like perlin_noise_3d.frames.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor for every axis, time included.
+    - width (int): Width of the frames.
+    - height (int): Height of the frames.
+    - t_start (float): Time of the first frame.
+    - t_step (float): Time between frames.
+    - count (int): Number of frames, None iterates forever.
+    - dtype (data-type): np.float64 or np.float32 for the computation and frames.
+    - step (int): Only every step-th row and column is computed, for previews.
+
+    Yields:
+    - frame (n-dimensional array): Noise of shape (ceil(height / step), ceil(width / step)) normalized
+      with the theoretical range, the same for every frame so the animation does not flicker.
+    """
+    index = 0
+    while count is None or index < count:
+        yield region(seed, scale, 0, 0, width, height, dtype, higher=(t_start + index * t_step,), step=step)
+        index += 1
+
+def perlin_sample(seed, scale, *coordinates):
+    """
+    Classic Perlin noise of any dimension at arbitrary points, from the 2**n lattice corners,
+    on the same hashed gradients as simplex, as the reference simplex is measured against in 4D.
+
+    Parameters:
+    - seed (int): Seed of the lattice.
+    - scale (float): Scale factor for every axis.
+    - coordinates (n-dimensional arrays): Map coordinates, x first, broadcast together.
+
+    Returns:
+    - noise (n-dimensional array): Raw noise value of every point.
+    """
+    position = [np.asarray(coordinate, dtype=np.float64) / scale for coordinate in coordinates]
+    cells = [np.floor(axis).astype(np.int64) for axis in position]
+    offsets = [axis - cell for axis, cell in zip(position, cells)]
+
+    # Corner dot products, then interpolate away one axis at a time, the last axis first
+    values = []
+    for corner in np.ndindex(*(2,) * len(position)):
+        gradient = gradients_at(seed, *(cell + bit for cell, bit in zip(cells, corner)))
+        values.append(sum(component * (offset - bit) for component, offset, bit in zip(gradient, offsets, corner)))
+    for offset in reversed(offsets):
+        weight = smoothstep(offset)
+        values = [lerp(low, high, weight) for low, high in zip(values[0::2], values[1::2])]
+    return values[0]
+
+if __name__ == '__main__':
+    # Throughput of point samples, simplex against Perlin in 2D, 3D and 4D
+    import time
+    import perlin_noise_tiles
+    import perlin_noise_3d
+    count = 1 << 20
+    points = np.random.default_rng(0).random((4, count)) * 1000
+    perlin = {
+        2: lambda: perlin_noise_tiles.sample(0, 30, points[0], points[1]),
+        3: lambda: perlin_noise_3d.sample(0, 30, points[0], points[1], points[2]),
+        4: lambda: perlin_sample(0, 30, *points),
+    }
+    for dimensions in (2, 3, 4):
+        for name, run in (("simplex", lambda: sample(0, 30, *points[:dimensions])), ("Perlin", perlin[dimensions])):
+            start = time.time()
+            run()
+            total = time.time() - start
+            print(f"{dimensions}D {name:>8} {count / total / 1e6:6.2f} MP/s")
@@ -0,0 +1,25 @@
+""" Checks of batch generation against single maps
+
+Run with:
+    python -m pytest test_perlin_noise_batch.py
+"""
+import numpy as np
+import perlin_noise_batch
+from perlin_noise_vectorized import generate_perlin_noise
+
+def test_maps_match_single_calls():
+    maps = perlin_noise_batch.generate_batch(96, 64, 16, [3, 4, 5])
+    for seed, noise in zip([3, 4, 5], maps):
+        assert np.allclose(noise, generate_perlin_noise(96, 64, 16, seed=seed))
+
+def test_several_maps_per_kernel_call(monkeypatch):
+    # 256 x 256 maps are larger than a block, blocks still span more than one map
+    batches = []
+    compute_block = perlin_noise_batch.compute_block
+    def counting_compute_block(gradients, *args, **kwargs):
+        batches.append(len(gradients))
+        return compute_block(gradients, *args, **kwargs)
+    monkeypatch.setattr(perlin_noise_batch, "compute_block", counting_compute_block)
+    maps = perlin_noise_batch.generate_batch(256, 256, 32, range(8), dtype=np.float32)
+    assert min(batches) > 1
+    assert np.allclose(maps[5], generate_perlin_noise(256, 256, 32, np.float32, 5), atol=1e-6)
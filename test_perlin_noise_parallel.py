@@ -0,0 +1,29 @@
+""" Checks of the parallel generator against the vectorized engine
+
+Run with:
+    python -m pytest test_perlin_noise_parallel.py
+"""
+import threading
+import numpy as np
+from perlin_noise_parallel import PerlinGenerator
+import perlin_noise_vectorized
+
+def test_concurrent_callers():
+    # Threads sharing one generator must each get their own map, never a neighbour's lattice
+    sizes = [(96, 64, 16), (64, 80, 20), (128, 48, 12)]
+    failures = []
+    with PerlinGenerator(2) as generator:
+        def caller(index):
+            for call in range(5):
+                width, height, scale = sizes[(index + call) % len(sizes)]
+                seed = index * 5 + call
+                noise = generator.generate(width, height, scale, seed)
+                expected = perlin_noise_vectorized.generate_perlin_noise(width, height, scale, seed=seed)
+                if not np.allclose(noise, expected):
+                    failures.append((index, call))
+        threads = [threading.Thread(target=caller, args=(index,)) for index in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert failures == []